@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Micro-benchmarks for the pure-Python hot paths.
+
+Each benchmark runs against a synthetic small preset (Twister-sized, 4x16)
+and a very large one (16 banks x 64 encoders, 16x the hardware). Results are seconds per call
+(best of several repeats).
+
+    python scripts/bench.py --save          # record the baseline
+    python scripts/bench.py                 # compare; exit 1 on regression
+    python scripts/bench.py -k config.      # only benchmarks matching a substring
+
+A benchmark regresses when it is slower than its baseline by more than
+``--threshold`` (default 0.25, i.e. 25%, or BENCH_THRESHOLD). Baselines are
+machine specific, so record one locally before comparing.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fighterdisplay.core.config import (
+    cc_map_from_config,
+    channels_from_config,
+    invert_cc_map,
+    labels_from_config,
+    load_config,
+    set_encoder_cc,
+)
+from fighterdisplay.core.presets import apply_labels
+from fighterdisplay.core.state import StateStore
+
+
+SIZES: Dict[str, Tuple[int, int]] = {"small": (4, 16), "large": (16, 64)}
+DEFAULT_BASELINE = Path(".benchmarks") / "baseline.json"
+
+# (name, timed function, optional setup run once before timing)
+Bench = Tuple[str, Callable[[], object], Optional[Callable[[], None]]]
+
+
+def make_config(banks: int, encoders: int) -> dict:
+    """Synthetic preset with every encoder labelled and mapped."""
+    return {
+        "layout": {"banks": banks, "encoders": encoders},
+        "banks": {
+            str(b): {
+                "encoders": {
+                    str(e): {
+                        "id": e,
+                        "label": f"Param {b}-{e}",
+                        "cc": ((b - 1) * encoders + e - 1) % 120,  # CCs 120-127 stay unmapped
+                        "channel": (b - 1) % 16 + 1,
+                    }
+                    for e in range(1, encoders + 1)
+                }
+            }
+            for b in range(1, banks + 1)
+        },
+    }
+
+
+def _config_benches(size: str, config: dict, workdir: Path) -> List[Bench]:
+    path = workdir / f"{size}.json"
+    path.write_text(json.dumps(config))
+    cc_map = cc_map_from_config(config)
+    banks, encoders = SIZES[size]
+    return [
+        (f"config.load_config[{size}]", lambda: load_config(path), None),
+        (f"config.labels_from_config[{size}]", lambda: labels_from_config(config), None),
+        (f"config.cc_map_from_config[{size}]", lambda: cc_map_from_config(config), None),
+        (f"config.channels_from_config[{size}]", lambda: channels_from_config(config), None),
+        (f"config.invert_cc_map[{size}]", lambda: invert_cc_map(cc_map), None),
+        (f"config.set_encoder_cc[{size}]", lambda: set_encoder_cc(config, banks, encoders, 64, label="Edited"), None),
+    ]
+
+
+def _state_benches(size: str, config: dict) -> List[Bench]:
+    banks, encoders = SIZES[size]
+    labels = labels_from_config(config)
+    store = StateStore()
+
+    def setup() -> None:
+        if not store.dump()["banks"]:
+            apply_labels(store, labels)
+
+    return [
+        (f"state.update_encoder[{size}]", lambda: store.update_encoder(banks, encoders, 64), setup),
+        (f"state.snapshot[{size}]", store.snapshot, setup),
+        (f"state.set_bank[{size}]", lambda: store.set_bank(1), setup),
+        (f"presets.apply_labels[{size}]", lambda: apply_labels(StateStore(), labels), None),
+    ]
+
+
+def _midi_benches(size: str, config: dict) -> List[Bench]:
+    from fighterdisplay.midi import device
+    from fighterdisplay.midi.scheduler import OutputScheduler
+    from fighterdisplay.midi.virtual import TWISTER, VIRTUAL
+    from fighterdisplay.ui.backend import main
+
+    cc_map = cc_map_from_config(config)
+    rev = invert_cc_map(cc_map)
+    mapped_cc = max(rev)
+    bank, _ = rev[mapped_cc]
+    unmapped_cc = next((cc for cc in range(128) if cc not in rev), None)
+
+    def setup() -> None:
+        # Fresh backend globals per benchmark so queues and logs start empty
+        main.state = StateStore()
+        main.midi_output = OutputScheduler()
+        apply_labels(main.state, labels_from_config(config))
+        main._install_mapping(cc_map, channels_from_config(config))
+        main.state.set_bank(bank)  # mapped CC hits the displayed bank: no bank switch
+
+    ports: dict = {}
+
+    def setup_virtual() -> None:
+        # Real raw I/O path against the in-process virtual Twister, unpaced
+        setup()
+        os.environ["MIDI_BACKEND"] = "virtual"
+        main.midi_output = OutputScheduler(rate=1e9, burst=1 << 20)
+        ports["device"] = VIRTUAL.reset()
+        ports["in"] = device.open_input_raw(TWISTER, main.process_cc)
+        ports["out"] = device.open_output_raw(TWISTER)
+
+    def roundtrip() -> None:
+        # Controller -> input callback -> state + LED echo -> output port
+        ports["device"].inject((0, mapped_cc, 64))
+        device.send_cc_batch(ports["out"], main.midi_output.take())
+
+    mapped = {"type": "control_change", "channel": 0, "control": mapped_cc, "value": 64}
+    benches: List[Bench] = [(f"main.process_midi_msg.mapped[{size}]", lambda: main.process_midi_msg(mapped), setup)]
+    if unmapped_cc is not None:
+        unmapped = {"type": "control_change", "channel": 0, "control": unmapped_cc, "value": 64}
+        benches.append((f"main.process_midi_msg.unmapped[{size}]", lambda: main.process_midi_msg(unmapped), setup))
+    benches.append((f"midi.virtual_roundtrip[{size}]", roundtrip, setup_virtual))
+    return benches
+
+
+def measure(fn: Callable[[], object], min_time: float, repeat: int) -> float:
+    """Best seconds-per-call over ``repeat`` runs of at least ``min_time`` each."""
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 2
+    return min(timer.repeat(repeat, number)) / number
+
+
+def run(pattern: str = "", min_time: float = 0.05, repeat: int = 5) -> Dict[str, float]:
+    results: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for size, (banks, encoders) in SIZES.items():
+            config = make_config(banks, encoders)
+            benches = _config_benches(size, config, Path(tmp)) + _state_benches(size, config) + _midi_benches(size, config)
+            for name, fn, setup in benches:
+                if pattern not in name:
+                    continue
+                if setup is not None:
+                    setup()
+                results[name] = measure(fn, min_time, repeat)
+    return results
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Names of the benchmarks slower than their baseline by more than ``threshold``."""
+    return [
+        name
+        for name, seconds in results.items()
+        if name in baseline and baseline[name] > 0 and seconds > baseline[name] * (1.0 + threshold)
+    ]
+
+
+def _format(seconds: float) -> str:
+    for unit, scale in (("s", 1.0), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", default="", help="only run benchmarks whose name contains this")
+    parser.add_argument("--baseline", type=Path, default=Path(os.getenv("BENCH_BASELINE", DEFAULT_BASELINE)))
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_THRESHOLD", "0.25")))
+    parser.add_argument("--save", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--quick", action="store_true", help="shorter runs (noisier); for smoke tests")
+    args = parser.parse_args(argv)
+
+    min_time, repeat = (0.005, 2) if args.quick else (0.05, 5)
+    results = run(args.pattern, min_time, repeat)
+
+    baseline: Dict[str, float] = {}
+    if args.baseline.exists():
+        try:
+            baseline = json.loads(args.baseline.read_text()).get("results", {})
+        except Exception:
+            print(f"warning: ignoring unreadable baseline {args.baseline}", file=sys.stderr)
+    regressions = set(compare(results, baseline, args.threshold))
+
+    for name, seconds in results.items():
+        line = f"{name:48s} {_format(seconds)}"
+        if name in baseline:
+            line += f"  ({seconds / baseline[name] - 1.0:+7.1%} vs baseline)"
+        if name in regressions:
+            line += "  REGRESSION"
+        print(line)
+
+    if args.save:
+        # Keep entries for benchmarks filtered out of this run
+        merged = {**baseline, **results}
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(
+            json.dumps({"python": platform.python_version(), "machine": platform.machine(), "results": merged}, indent=2)
+        )
+        print(f"baseline written to {args.baseline}")
+        return 0
+    if not baseline:
+        print(f"no baseline at {args.baseline}; run with --save to record one")
+        return 0
+    if regressions:
+        print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""Soak test: replay hours of synthetic traffic and fail if memory or tasks keep growing.
+
+Runs the backend in-process and replays, per simulated minute, a CC flood from
+a non-loop thread (as the MIDI backend does, including bank-select messages),
+WebSocket clients connecting, subscribing and disconnecting while one client
+stays connected throughout, and REST traffic (conditional GETs, long-polls,
+bank switches, scene capture and morphs). After every simulated minute it
+samples the traced Python heap (tracemalloc), RSS and the event-loop task
+count.
+
+    python scripts/soak.py --hours 8          # one festival day, time-compressed
+    python scripts/soak.py --hours 0.25 --rate 20
+
+Samples after the warm-up are split into windows; the run fails (exit 1) when
+the last window is larger than the first by more than the allowed growth.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import json
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Dict, List
+
+
+def _rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as fh:
+            pages = int(fh.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 2**20
+    except (OSError, ValueError, IndexError):
+        # Peak rather than current RSS, but still catches steady growth
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _write_preset(path: Path, banks: int = 4, encoders: int = 16) -> None:
+    config = {
+        "banks": {
+            str(b): {
+                "encoders": {
+                    str(e): {"id": e, "label": f"Soak {b}-{e}", "cc": (b - 1) * encoders + e - 1, "channel": 1}
+                    for e in range(1, encoders + 1)
+                }
+            }
+            for b in range(1, banks + 1)
+        }
+    }
+    path.write_text(json.dumps(config))
+
+
+def _drain(ws) -> None:
+    # Keep the long-lived test client's inbox empty, like a browser would
+    try:
+        while True:
+            ws.receive()
+    except Exception:
+        pass
+
+
+def _simulate_minute(client, main, rng: random.Random, minute: int, rate: int) -> None:
+    # CC flood from this (non-loop) thread, like the MIDI input callback: mostly
+    # the encoders of the displayed bank, sometimes another bank or a bank select
+    for _ in range(rate * 60):
+        roll = rng.random()
+        if roll < 0.002:
+            main.process_cc((3, rng.randrange(4), 127))
+        elif roll < 0.02:
+            main.process_cc((0, rng.randrange(64), rng.randrange(128)))
+        else:
+            first = (main.state.current_bank - 1) * 16
+            main.process_cc((0, first + rng.randrange(16), rng.randrange(128)))
+    # Clients come and go with assorted subscriptions
+    for _ in range(rng.randint(1, 3)):
+        banks = rng.choice(["current", "all", "1,2", "3"])
+        with client.websocket_connect(f"/ws?banks={banks}&visible={rng.randint(0, 1)}") as ws:
+            ws.receive_text()
+            if rng.random() < 0.5:
+                ws.send_text(json.dumps({"type": "subscribe", "visible": True, "max_fps": 30}))
+    # REST traffic
+    r = client.get("/api/state")
+    client.get("/api/state", headers={"If-None-Match": r.headers.get("etag", "")})
+    client.get("/api/state", params={"wait": r.json()["version"], "timeout": 0.01})
+    client.get("/api/mapping")
+    client.post("/api/bank", json={"bank": rng.randint(1, 4)})
+    name = f"soak-{minute % 4}"
+    client.post("/api/scenes", json={"name": name})
+    if minute % 5 == 0:
+        client.post("/api/scenes/morph", json={"to": name, "duration": 0.05, "curve": "ease_in_out"})
+
+
+def _window_growth(samples: List[Dict[str, float]], key: str, warmup: int) -> float:
+    steady = samples[warmup:]
+    window = max(1, len(steady) // 4)
+    first = statistics.mean(s[key] for s in steady[:window])
+    last = statistics.mean(s[key] for s in steady[-window:])
+    return last - first
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hours", type=float, default=1.0, help="simulated hours of traffic (one round per minute)")
+    parser.add_argument("--rate", type=int, default=50, help="CC messages per simulated second")
+    parser.add_argument("--warmup", type=float, default=0.2, help="fraction of rounds ignored while caches fill")
+    parser.add_argument("--max-heap-growth-mb", type=float, default=2.0)
+    parser.add_argument("--max-rss-growth-mb", type=float, default=16.0)
+    parser.add_argument("--max-task-growth", type=float, default=2.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rounds = max(4, int(args.hours * 60))
+    tmp = tempfile.TemporaryDirectory()
+    preset = Path(tmp.name) / "soak.json"
+    _write_preset(preset)
+    os.environ["CONFIG_PATH"] = str(preset)
+    os.environ.setdefault("PRESET_CACHE_DIR", "off")
+
+    tracemalloc.start()
+    from fastapi.testclient import TestClient
+
+    from fighterdisplay.ui.backend import main as backend
+
+    rng = random.Random(args.seed)
+    samples: List[Dict[str, float]] = []
+    started = time.monotonic()
+    with TestClient(backend.app) as client:
+        with client.websocket_connect("/ws?banks=all") as resident:
+            threading.Thread(target=_drain, args=(resident,), daemon=True).start()
+            for minute in range(rounds):
+                _simulate_minute(client, backend, rng, minute, args.rate)
+                time.sleep(0.05)  # let heartbeats, spawned broadcasts and morphs settle
+                gc.collect()
+                stats = client.get("/api/stats").json()
+                samples.append(
+                    {
+                        "heap_mb": tracemalloc.get_traced_memory()[0] / 2**20,
+                        "rss_mb": _rss_mb(),
+                        "tasks": float(stats["tasks"]),
+                    }
+                )
+                if minute % 60 == 59 or minute == rounds - 1:
+                    s = samples[-1]
+                    print(
+                        f"[{(minute + 1) / 60:5.2f} h] heap {s['heap_mb']:7.2f} MB  rss {s['rss_mb']:7.1f} MB  "
+                        f"tasks {int(s['tasks'])}  ({time.monotonic() - started:.0f}s)"
+                    )
+        final = client.get("/api/stats").json()
+    tracemalloc.stop()
+    tmp.cleanup()
+
+    warmup = min(rounds - 2, int(rounds * args.warmup))
+    limits = {
+        "heap_mb": args.max_heap_growth_mb,
+        "rss_mb": args.max_rss_growth_mb,
+        "tasks": args.max_task_growth,
+    }
+    failed = False
+    for key, limit in limits.items():
+        growth = _window_growth(samples, key, warmup)
+        verdict = "ok" if growth <= limit else "GROWING"
+        failed |= growth > limit
+        print(f"{key:8s} growth {growth:+8.2f} (limit {limit:g})  {verdict}")
+    print("overflow counters:", json.dumps({k: v for k, v in final.items() if k != "tasks"}, sort_keys=True))
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import json
+import os
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Tuple
+
+from .cache import compile_config
+from .config import normalize_config, save_config
+from .presets import safe_preset_name
+
+
+ARCHIVE_FORMATS = {"zip": "application/zip", "tar": "application/gzip"}
+MAX_ENTRY_BYTES = 1024 * 1024  # presets are small JSON files; refuse anything huge
+MAX_ARCHIVE_BYTES = 64 * 1024 * 1024  # whole uploaded archive
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that hands written bytes back in chunks.
+
+    zipfile and tarfile both support non-seekable outputs, so the archive can be
+    produced incrementally with memory bounded by a single entry.
+    """
+
+    def __init__(self) -> None:
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self._chunks)
+        self._chunks.clear()
+        return out
+
+
+def iter_export(directory: str | Path, names: Iterable[str], fmt: str = "zip") -> Iterator[bytes]:
+    """Yield a zip (or gzipped tar) archive of the named presets chunk by chunk."""
+    directory = Path(directory)
+    sink = _ChunkSink()
+    if fmt == "tar":
+        archive = tarfile.open(fileobj=sink, mode="w|gz")
+    else:
+        archive = zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED)
+    with archive:
+        for name in names:
+            path = directory / name
+            if not path.is_file():
+                continue
+            if fmt == "tar":
+                archive.add(str(path), arcname=name)
+            else:
+                archive.write(str(path), arcname=name)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+def _iter_entries(fileobj: BinaryIO) -> Iterator[Tuple[str, int, BinaryIO | None]]:
+    """Yield (name, size, reader) for each regular file in a zip or tar archive."""
+    head = fileobj.read(4)
+    fileobj.seek(0)
+    if head.startswith(b"PK"):
+        with zipfile.ZipFile(fileobj) as zf:
+            for info in zf.infolist():
+                if info.is_dir():
+                    continue
+                with zf.open(info) as reader:
+                    yield info.filename, info.file_size, reader
+        return
+    with tarfile.open(fileobj=fileobj, mode="r|*") as tf:
+        for member in tf:
+            if member.isfile():
+                yield member.name, member.size, tf.extractfile(member)
+
+
+def import_archive(fileobj: BinaryIO, directory: str | Path, overwrite: bool = True) -> Dict[str, list]:
+    """Validate and install every preset in a zip/tar archive into ``directory``.
+
+    Entries are checked one at a time as they are read: the file name must be a
+    safe ``*.json`` name, the body must parse, pass :func:`normalize_config` and
+    compile (see :func:`~fighterdisplay.core.cache.compile_config`), so nothing
+    is imported that loading would refuse. Each accepted preset is written atomically. Returns the imported names and
+    the skipped ones with a reason.
+    """
+    imported: List[str] = []
+    skipped: List[Dict[str, str]] = []
+    try:
+        for entry_name, size, reader in _iter_entries(fileobj):
+            name = safe_preset_name(os.path.basename(entry_name))
+            if not name or not entry_name.endswith(".json"):
+                skipped.append({"name": entry_name, "error": "invalid name"})
+                continue
+            if size > MAX_ENTRY_BYTES:
+                skipped.append({"name": entry_name, "error": "too large"})
+                continue
+            if reader is None:
+                skipped.append({"name": entry_name, "error": "unreadable"})
+                continue
+            try:
+                config = normalize_config(json.loads(reader.read(MAX_ENTRY_BYTES + 1)))
+            except Exception:
+                config = None
+            if config is None:
+                skipped.append({"name": entry_name, "error": "invalid preset"})
+                continue
+            try:
+                compile_config(config)
+            except Exception as exc:
+                skipped.append({"name": entry_name, "error": str(exc) or "invalid preset"})
+                continue
+            path = Path(directory) / name
+            if not overwrite and path.exists():
+                skipped.append({"name": entry_name, "error": "exists"})
+                continue
+            if save_config(path, config):
+                imported.append(name)
+            else:
+                skipped.append({"name": entry_name, "error": "write failed"})
+    except (tarfile.TarError, zipfile.BadZipFile, EOFError, OSError):
+        skipped.append({"name": "", "error": "invalid archive"})
+    return {"imported": imported, "skipped": skipped}
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import hashlib
+import marshal
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict
+
+from .config import (
+    Config,
+    load_config,
+    layout_from_config,
+    labels_from_config,
+    cc_map_from_config,
+    channels_from_config,
+    invert_cc_map,
+)
+
+
+# Bump when the compiled layout changes so stale cache files are ignored
+CACHE_FORMAT = 1
+# Entries kept per cache directory; the least recently written go first
+MAX_CACHE_ENTRIES = 64
+Compiled = Dict[str, Any]
+
+
+def compile_config(config: Config) -> Compiled:
+    """Derive everything the server needs from a preset in one pass."""
+    cc_map = cc_map_from_config(config)
+    return {
+        "config": config,
+        "layout": layout_from_config(config),
+        "labels": labels_from_config(config),
+        "cc_map": cc_map,
+        "channels": channels_from_config(config),
+        "cc_reverse": invert_cc_map(cc_map),
+    }
+
+
+def _cache_dir() -> Path | None:
+    raw = os.getenv("PRESET_CACHE_DIR")
+    if raw is None:
+        return Path.home() / ".cache" / "ringside"
+    if raw.strip() in ("", "0", "off"):
+        return None
+    return Path(raw)
+
+
+def _prune(cache_dir: Path) -> None:
+    """Drop entries whose preset no longer exists, then the oldest beyond ``MAX_CACHE_ENTRIES``."""
+    entries = []
+    for entry in cache_dir.glob("*.bin"):
+        try:
+            source = marshal.loads(entry.read_bytes()).get("source")
+            if source is None or not os.path.exists(source):
+                entry.unlink()
+                continue
+            entries.append((entry.stat().st_mtime_ns, entry))
+        except Exception:
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+    entries.sort(reverse=True)
+    for _, entry in entries[MAX_CACHE_ENTRIES:]:
+        try:
+            entry.unlink()
+        except OSError:
+            pass
+
+
+def load_compiled(path: str | Path) -> Compiled:
+    """Load and compile a preset, reusing an on-disk cache keyed by path, mtime and size.
+
+    The cache is a marshal dump (plain data only) under ``PRESET_CACHE_DIR``
+    (default ``~/.cache/ringside``; set it to ``off`` to disable). Writing a
+    new entry prunes those of deleted presets and caps the directory at
+    ``MAX_CACHE_ENTRIES``. Any cache problem falls back to parsing the JSON.
+    """
+    p = Path(path)
+    cache_dir = _cache_dir()
+    try:
+        st = p.stat()
+    except OSError:
+        return compile_config(load_config(p))
+    if cache_dir is None:
+        return compile_config(load_config(p))
+    stamp = (CACHE_FORMAT, marshal.version, st.st_mtime_ns, st.st_size)
+    source = str(p.resolve())
+    cache_file = cache_dir / (hashlib.sha1(source.encode()).hexdigest()[:20] + ".bin")
+    try:
+        cached = marshal.loads(cache_file.read_bytes())
+        if cached.get("stamp") == stamp:
+            return cached["compiled"]
+    except Exception:
+        pass
+    compiled = compile_config(load_config(p))
+    tmp = None
+    try:
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(marshal.dumps({"stamp": stamp, "source": source, "compiled": compiled}))
+        os.replace(tmp, cache_file)
+        tmp = None
+        _prune(cache_dir)
+    except Exception:
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+    return compiled
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import threading
+import uuid
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+
+Change = Dict[str, Any]
+
+
+def _expand(change: Change) -> List[Change]:
+    """Split a batched ``values`` change ([[bank, encoder, value], ...]) into encoder changes."""
+    if change.get("type") != "values":
+        return [change]
+    return [{"type": "encoder", "bank": b, "encoder": e, "value": v} for b, e, v in change.get("values", ())]
+
+
+def _change_key(change: Change) -> Tuple[Any, ...]:
+    """Key used to coalesce changes: later entries with the same key win."""
+    kind = change.get("type")
+    if kind == "encoder":
+        return (kind, change.get("bank"), change.get("encoder"))
+    return (kind,)
+
+
+class ChangeLog:
+    """Bounded, thread-safe log of recent changes keyed by version.
+
+    Every appended change gets the next version number. Clients that remember the
+    last version they saw can ask for the changes since then; once the log has
+    rolled past that version (or the server restarted) they need a full snapshot.
+    """
+
+    def __init__(self, capacity: int = 1024) -> None:
+        self._entries: Deque[Tuple[int, Change]] = deque(maxlen=max(1, int(capacity)))
+        self._version = 0
+        # Oldest version a client can resync from using deltas alone
+        self._floor = 0
+        # Distinguishes this process' version numbers from a previous run's
+        self.epoch = uuid.uuid4().hex[:12]
+        self._lock = threading.Lock()
+
+    @property
+    def version(self) -> int:
+        with self._lock:
+            return self._version
+
+    def append(self, change: Change) -> int:
+        with self._lock:
+            self._version += 1
+            if len(self._entries) == self._entries.maxlen:
+                self._floor = self._entries[0][0]
+            self._entries.append((self._version, change))
+            return self._version
+
+    def reset(self) -> int:
+        """Drop all entries so every older version requires a full snapshot."""
+        with self._lock:
+            self._version += 1
+            self._entries.clear()
+            self._floor = self._version
+            return self._version
+
+    def since(self, version: int, epoch: Optional[str] = None) -> Optional[List[Change]]:
+        """Return coalesced changes after ``version``, or None if a snapshot is needed.
+
+        Changes to the same encoder (and repeated bank/mapping changes) are merged
+        into one entry, ordered by version and tagged with its ``version``.
+        Batched ``values`` changes come back as one encoder change per entry.
+        """
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                return None
+            if version < self._floor or version > self._version:
+                return None
+            latest: Dict[Tuple[Any, ...], Change] = {}
+            for v, change in self._entries:
+                if v <= version:
+                    continue
+                for item in _expand(change):
+                    key = _change_key(item)
+                    # Merge so an earlier label survives a later value-only change
+                    prev = latest.pop(key, {})
+                    latest[key] = {**prev, **item, "version": v}
+            return list(latest.values())
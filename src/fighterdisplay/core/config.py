@@ -1,19 +1,23 @@
 from __future__ import annotations
 
 import json
+import os
+import tempfile
 from pathlib import Path
 from typing import Dict, Any, Tuple
 
 
 # Config schema (normalized in memory):
 # {
+#   "layout": {"banks": 4, "encoders": 16, "bank_select_channel": 4, "bank_select_cc": 0},  # optional
 #   "banks": {
 #     "1": { "encoders": {
 #       "1": {"id": 1, "label": "Cutoff", "cc": 14, "channel": 1},
 #       ...
 #     }},
 #     ...
-#   }
+#   },
+#   "device": {"sysex": "<base64>", "bytes": 448}  # optional, from /api/device/dump
 # }
 
 
@@ -22,6 +26,12 @@ LabelsMap = Dict[int, Dict[int, str]]
 CcMap = Dict[int, Dict[int, int]]
 ChanMap = Dict[int, Dict[int, int]]
 RevMap = Dict[int, Tuple[int, int]]
+Layout = Dict[str, int]
+
+
+# Midi Fighter Twister profile: 4 banks of 16 encoders, bank select via
+# CC 0..3 (value 127) on channel 4. Presets may override any field.
+DEFAULT_LAYOUT: Layout = {"banks": 4, "encoders": 16, "bank_select_channel": 4, "bank_select_cc": 0}
 
 
 def _ensure_int_keys(d: Dict[str, Any]) -> Dict[int, Any]:
@@ -34,31 +44,75 @@ def _ensure_int_keys(d: Dict[str, Any]) -> Dict[int, Any]:
     return out
 
 
+def normalize_config(data: Any) -> Config | None:
+    """Return ``data`` as a normalized config, or None if it is not a preset."""
+    if not isinstance(data, dict):
+        return None
+    # Normalize presence
+    data.setdefault("banks", {})
+    if not isinstance(data["banks"], dict):
+        return None
+    return data
+
+
 def load_config(path: str | Path) -> Config:
     p = Path(path)
     if not p.exists():
         return {"banks": {}}
     try:
-        data: Config = json.loads(p.read_text())
-        if not isinstance(data, dict):
-            return {"banks": {}}
-        # Normalize presence
-        data.setdefault("banks", {})
-        return data
+        return normalize_config(json.loads(p.read_text())) or {"banks": {}}
     except Exception:
         return {"banks": {}}
 
 
 def save_config(path: str | Path, config: Config) -> bool:
+    """Write the config atomically (temp file + rename) so readers never see a partial file."""
+    tmp = None
     try:
         p = Path(path)
         p.parent.mkdir(parents=True, exist_ok=True)
-        p.write_text(json.dumps(config, indent=2))
+        fd, tmp = tempfile.mkstemp(dir=p.parent, prefix=f".{p.name}.", suffix=".tmp")
+        with os.fdopen(fd, "w") as f:
+            f.write(json.dumps(config, indent=2))
+        # mkstemp creates 0600 files; keep presets readable like before
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, p)
         return True
     except Exception:
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
         return False
 
 
+def layout_from_config(config: Config, default: Layout | None = None) -> Layout:
+    """Return the controller geometry from the preset's optional ``layout`` block.
+
+    Raises ValueError when the bank-select CCs (``bank_select_cc`` + one per
+    bank) would run past CC 127.
+    """
+    layout = dict(default or DEFAULT_LAYOUT)
+    raw = config.get("layout")
+    if isinstance(raw, dict):
+        for key in layout:
+            try:
+                layout[key] = int(raw[key])
+            except Exception:
+                pass
+    layout["banks"] = max(1, min(128, layout["banks"]))
+    layout["encoders"] = max(1, min(128, layout["encoders"]))
+    layout["bank_select_channel"] = max(1, min(16, layout["bank_select_channel"]))
+    layout["bank_select_cc"] = max(0, min(127, layout["bank_select_cc"]))
+    if layout["bank_select_cc"] + layout["banks"] > 128:
+        raise ValueError(
+            f"layout: {layout['banks']} banks need bank-select CCs {layout['bank_select_cc']}-"
+            f"{layout['bank_select_cc'] + layout['banks'] - 1}, past CC 127"
+        )
+    return layout
+
+
 def labels_from_config(config: Config) -> LabelsMap:
     labels: LabelsMap = {}
     banks = config.get("banks", {})
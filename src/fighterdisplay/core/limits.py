@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+import threading
+from typing import Dict
+
+
+class Gate:
+    """Counting admission gate with overflow accounting.
+
+    ``try_enter()`` admits up to ``limit`` holders at once and counts every
+    refusal in ``rejected``; holders call ``leave()`` when done. Used to bound
+    in-flight broadcast spawns, WebSocket clients and long-poll waiters, where
+    the overflow policy is "drop the newcomer": the next heartbeat or snapshot
+    carries the same state anyway.
+    """
+
+    def __init__(self, limit: int) -> None:
+        self.limit = max(1, int(limit))
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def try_enter(self) -> bool:
+        with self._lock:
+            if self.active >= self.limit:
+                self.rejected += 1
+                return False
+            self.active += 1
+            self.admitted += 1
+            self.peak = max(self.peak, self.active)
+            return True
+
+    def leave(self) -> None:
+        with self._lock:
+            self.active = max(0, self.active - 1)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "active": self.active,
+                "limit": self.limit,
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "peak": self.peak,
+            }
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import socket
+import struct
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+Address = Tuple[str, int]
+
+MAX_PACKET = 1400  # stay under a typical Ethernet MTU; larger frames are split
+_IMMEDIATELY = struct.pack(">Q", 1)  # OSC time tag meaning "now"
+
+
+def _pad(data: bytes) -> bytes:
+    """OSC strings/blobs are NUL-terminated and padded to a multiple of 4 bytes."""
+    return data + b"\0" * (4 - len(data) % 4)
+
+
+def osc_message(address: str, *args) -> bytes:
+    """Encode one OSC message; ints become ``i``, floats ``f`` and strings ``s``."""
+    tags = ","
+    payload = b""
+    for arg in args:
+        if isinstance(arg, bool) or isinstance(arg, int):
+            tags += "i"
+            payload += struct.pack(">i", int(arg))
+        elif isinstance(arg, float):
+            tags += "f"
+            payload += struct.pack(">f", arg)
+        else:
+            tags += "s"
+            payload += _pad(str(arg).encode())
+    return _pad(address.encode()) + _pad(tags.encode()) + payload
+
+
+def osc_bundle(messages: Iterable[bytes]) -> bytes:
+    return b"#bundle\0" + _IMMEDIATELY + b"".join(struct.pack(">i", len(m)) + m for m in messages)
+
+
+def parse_targets(spec: str) -> List[Address]:
+    """``"127.0.0.1:9000, lights.local:8000"`` -> [(host, port), ...]; bad entries are skipped."""
+    targets: List[Address] = []
+    for item in (spec or "").split(","):
+        host, _, port = item.strip().rpartition(":")
+        try:
+            if host and 0 < int(port) < 65536:
+                targets.append((host, int(port)))
+        except ValueError:
+            pass
+    return targets
+
+
+class OscFanout:
+    """Coalesces encoder changes and sends them as OSC bundles over UDP.
+
+    ``push()`` only records the latest value per encoder under a lock, so it
+    is safe and cheap on the MIDI hot path. ``flush()``, called once per frame
+    by the server, turns everything pending into one bundle per destination
+    (split at ``MAX_PACKET``) and sends it on a non-blocking socket; a send
+    that would block is dropped and counted rather than waited for.
+
+    Addresses: ``{prefix}/{bank}/{encoder}`` with the value as int 0-127 and
+    float 0.0-1.0, and ``{prefix}/bank`` with the current bank.
+
+    ``on_ready``, when set, is called (outside the lock) when a change arrives
+    with nothing pending, so the server only runs frames while there is
+    something to send.
+    """
+
+    def __init__(self, targets: Iterable[Address], prefix: str = "/ringside") -> None:
+        # Resolve once: sendto() with a host name would do a blocking lookup per packet
+        self.targets: List[Address] = []
+        for host, port in targets:
+            try:
+                self.targets.append((socket.gethostbyname(host), int(port)))
+            except OSError:
+                pass
+        self.prefix = "/" + prefix.strip("/") if prefix.strip("/") else ""
+        self._pending: Dict[Tuple[int, int], int] = {}
+        self._bank: Optional[int] = None
+        self._lock = threading.Lock()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sock.setblocking(False)
+        self.sent = 0
+        self.dropped = 0
+        self.on_ready: Optional[Callable[[], None]] = None
+
+    def _idle(self) -> bool:
+        return not self._pending and self._bank is None
+
+    def _ready(self) -> None:
+        callback = self.on_ready
+        if callback is not None:
+            callback()
+
+    def push(self, bank: int, encoder: int, value: int) -> None:
+        with self._lock:
+            idle = self._idle()
+            self._pending[(int(bank), int(encoder))] = int(value)
+        if idle:
+            self._ready()
+
+    def push_many(self, updates: Iterable[Tuple[int, int, int]]) -> None:
+        with self._lock:
+            idle = self._idle()
+            for bank, encoder, value in updates:
+                self._pending[(int(bank), int(encoder))] = int(value)
+            ready = idle and not self._idle()
+        if ready:
+            self._ready()
+
+    def push_bank(self, bank: int) -> None:
+        with self._lock:
+            idle = self._idle()
+            self._bank = int(bank)
+        if idle:
+            self._ready()
+
+    def _packets(self) -> List[bytes]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            bank, self._bank = self._bank, None
+        messages = []
+        if bank is not None:
+            messages.append(osc_message(f"{self.prefix}/bank", bank))
+        for (b, e), value in pending.items():
+            messages.append(osc_message(f"{self.prefix}/{b}/{e}", value, value / 127.0))
+        packets: List[bytes] = []
+        chunk: List[bytes] = []
+        size = 16
+        for msg in messages:
+            if chunk and size + 4 + len(msg) > MAX_PACKET:
+                packets.append(osc_bundle(chunk))
+                chunk, size = [], 16
+            chunk.append(msg)
+            size += 4 + len(msg)
+        if chunk:
+            packets.append(osc_bundle(chunk))
+        return packets
+
+    def flush(self) -> int:
+        """Send everything pending; returns the number of datagrams sent."""
+        packets = self._packets()
+        sent = 0
+        for packet in packets:
+            for target in self.targets:
+                try:
+                    self._sock.sendto(packet, target)
+                    sent += 1
+                except OSError:
+                    # Includes BlockingIOError: never stall the frame on one target
+                    self.dropped += 1
+        self.sent += sent
+        return sent
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            pending = len(self._pending)
+        return {"targets": len(self.targets), "pending": pending, "sent": self.sent, "dropped": self.dropped}
+
+    def close(self) -> None:
+        self._sock.close()
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Dict, Tuple
+
+try:  # Optional fast encoder
+    import orjson as _orjson  # type: ignore
+except Exception:  # ImportError or broken wheel
+    _orjson = None
+
+
+def dumps(obj: Any) -> str:
+    """Compact JSON text; int dict keys become strings like ``json.dumps`` does."""
+    if _orjson is not None:
+        return _orjson.dumps(obj, option=_orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+
+class FragmentCache:
+    """Encoded JSON blocks keyed by name and the version of their source data.
+
+    A block is re-encoded only when asked for with a different version, so
+    rarely-changing parts (mapping, channels, idle state) cost one encode.
+    """
+
+    def __init__(self, max_entries: int = 256) -> None:
+        self._entries: Dict[str, Tuple[Any, str]] = {}
+        self._max_entries = max_entries
+
+    def get(self, name: str, version: Any, build: Callable[[], Any]) -> str:
+        entry = self._entries.get(name)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        text = dumps(build())
+        if name not in self._entries and len(self._entries) >= self._max_entries:
+            # Per-subscription blocks can vary; evict the oldest rather than grow
+            try:
+                del self._entries[next(iter(self._entries))]
+            except (KeyError, StopIteration, RuntimeError):
+                pass
+        # Single assignment: safe to race with readers on other threads
+        self._entries[name] = (version, text)
+        return text
+
+
+def assemble(fragments: Dict[str, str], dynamic: Dict[str, Any]) -> str:
+    """Splice pre-encoded ``fragments`` and the small ``dynamic`` part into one JSON object."""
+    parts = [f'"{key}":{text}' for key, text in fragments.items()]
+    tail = dumps(dynamic)
+    if tail != "{}":
+        parts.append(tail[1:-1])
+    return "{" + ",".join(parts) + "}"
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import json
+import re
 from pathlib import Path
 from typing import Dict, Any
 
@@ -8,6 +9,18 @@ from .state import StateStore
 from .config import labels_from_config
 
 
+def safe_preset_name(name: str) -> str | None:
+    """Return ``name`` as a plain ``*.json`` file name, or None if it is unsafe."""
+    base = name.strip()
+    if not base:
+        return None
+    if not base.endswith(".json"):
+        base += ".json"
+    if not re.match(r"^[A-Za-z0-9._-]+\.json$", base):
+        return None
+    return base
+
+
 def load_preset(path: str | Path) -> Dict[int, Dict[int, str]]:
     p = Path(path)
     if not p.exists():
@@ -27,13 +40,4 @@ def apply_labels(store: StateStore, labels_by_bank: Dict[int, Dict[int, str]]) -
     For any provided bank/encoder, set the label while keeping the current value if present,
     defaulting to 0 otherwise.
     """
-    snapshot = store.snapshot()
-    for bank, encs in labels_by_bank.items():
-        for enc_idx, label in encs.items():
-            current_value = 0
-            try:
-                current_value = snapshot.banks[bank].encoders[enc_idx].value
-            except Exception:
-                # Bank or encoder might not exist yet; keep default 0
-                pass
-            store.update_encoder(bank, enc_idx, current_value, label=label)
+    store.set_labels(labels_by_bank)
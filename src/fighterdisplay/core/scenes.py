@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import functools
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .state import StateStore
+
+
+@functools.lru_cache(maxsize=None)
+def _safe_import_numpy():
+    # Optional, for vectorised interpolation; imported on first morph so the
+    # server does not pay for it at startup
+    try:
+        import numpy  # type: ignore
+
+        return numpy
+    except Exception:  # pragma: no cover - exercised when numpy is not installed
+        return None
+
+
+Key = Tuple[int, int]  # (bank, encoder)
+Scene = Dict[Key, int]  # encoder values 0-127
+Update = Tuple[int, int, int]  # (bank, encoder, value)
+
+
+CURVES: Dict[str, Callable[[float], float]] = {
+    "linear": lambda t: t,
+    "ease_in": lambda t: t * t,
+    "ease_out": lambda t: 1.0 - (1.0 - t) * (1.0 - t),
+    "ease_in_out": lambda t: t * t * (3.0 - 2.0 * t),
+}
+
+
+def capture(store: StateStore, banks: Optional[Iterable[int]] = None) -> Scene:
+    """Snapshot the value of every encoder in ``store`` (optionally only ``banks``)."""
+    dumped = store.dump(banks)
+    return {
+        (int(bank), int(enc)): int(enc_state["value"])
+        for bank, bank_state in dumped["banks"].items()
+        for enc, enc_state in bank_state["encoders"].items()
+    }
+
+
+def scene_to_json(scene: Scene) -> Dict[str, Dict[str, int]]:
+    out: Dict[str, Dict[str, int]] = {}
+    for (bank, enc), value in sorted(scene.items()):
+        out.setdefault(str(bank), {})[str(enc)] = value
+    return out
+
+
+class Morph:
+    """Interpolates every encoder from a start scene to a target scene.
+
+    ``step()`` evaluates the curve once per call and interpolates all encoders
+    as one array operation (numpy when installed, a flat list comprehension
+    otherwise), quantises to 0-127 and returns only the encoders whose value
+    changed since the previous step.
+    """
+
+    def __init__(
+        self,
+        start: Scene,
+        target: Scene,
+        duration: float,
+        curve: str = "linear",
+        shown: Optional[Scene] = None,
+        now: Optional[float] = None,
+    ) -> None:
+        if curve not in CURVES:
+            raise ValueError(f"unknown curve: {curve}")
+        self.curve = curve
+        self._ease = CURVES[curve]
+        self.duration = max(0.0, float(duration))
+        self.started = time.monotonic() if now is None else now
+        # Only encoders stored in the target move; missing start values jump
+        self.keys: List[Key] = sorted(target)
+        begin = [float(start.get(k, target[k])) for k in self.keys]
+        delta = [float(target[k]) - b for k, b in zip(self.keys, begin)]
+        # What clients/device currently show, so the first step sends only differences
+        shown = start if shown is None else shown
+        last = [int(shown.get(k, -1)) for k in self.keys]
+        self._np = _np = _safe_import_numpy()
+        if _np is not None:
+            self._begin = _np.array(begin)
+            self._delta = _np.array(delta)
+            self._last = _np.array(last, dtype=_np.int64)
+        else:
+            self._begin = begin
+            self._delta = delta
+            self._last = last
+        self.done = not self.keys
+
+    def progress(self, now: float) -> float:
+        if self.duration <= 0:
+            return 1.0
+        return max(0.0, min(1.0, (now - self.started) / self.duration))
+
+    def step(self, now: Optional[float] = None) -> List[Update]:
+        """Values that changed since the last step; sets ``done`` at the end of the morph."""
+        if self.done:
+            return []
+        t = self.progress(time.monotonic() if now is None else now)
+        k = self._ease(t)
+        keys = self.keys
+        _np = self._np
+        if _np is not None:
+            values = _np.clip(_np.rint(self._begin + self._delta * k), 0, 127).astype(_np.int64)
+            changed = _np.flatnonzero(values != self._last)
+            self._last = values
+            updates = [(keys[i][0], keys[i][1], int(values[i])) for i in changed.tolist()]
+        else:
+            values = [min(127, max(0, round(b + d * k))) for b, d in zip(self._begin, self._delta)]
+            updates = [(key[0], key[1], v) for key, v, old in zip(keys, values, self._last) if v != old]
+            self._last = values
+        if t >= 1.0:
+            self.done = True
+        return updates
+
+    def describe(self, now: Optional[float] = None) -> dict:
+        now = time.monotonic() if now is None else now
+        return {
+            "curve": self.curve,
+            "duration": self.duration,
+            "progress": self.progress(now),
+            "encoders": len(self.keys),
+            "done": self.done,
+        }
@@ -0,0 +1,175 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .config import load_config, labels_from_config, cc_map_from_config, channels_from_config
+
+
+class IndexedEncoder(NamedTuple):
+    bank: int
+    encoder: int
+    label: str
+    cc: Optional[int]
+    channel: int  # 1-16
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+def _entries_from_config(config: Dict[str, Any]) -> List[IndexedEncoder]:
+    labels = labels_from_config(config)
+    ccs = cc_map_from_config(config)
+    chans = channels_from_config(config)
+    entries: List[IndexedEncoder] = []
+    for bank in sorted(set(labels) | set(ccs)):
+        bank_labels = labels.get(bank, {})
+        bank_ccs = ccs.get(bank, {})
+        for enc in sorted(set(bank_labels) | set(bank_ccs)):
+            entries.append(
+                IndexedEncoder(bank, enc, bank_labels.get(enc, ""), bank_ccs.get(enc), chans.get(bank, {}).get(enc, 1))
+            )
+    return entries
+
+
+class PresetIndex:
+    """Incremental inverted index over the preset files in a directory.
+
+    ``refresh()`` re-reads only files whose mtime or size changed and drops
+    deleted ones; ``search()`` answers label token/substring and CC/channel
+    queries from the postings without touching the disk.
+    """
+
+    def __init__(self) -> None:
+        self._stamps: Dict[str, Tuple[int, int]] = {}  # name -> (mtime_ns, size)
+        self._entries: Dict[str, List[IndexedEncoder]] = {}
+        self._tokens: Dict[str, Set[str]] = {}  # label token -> preset names
+        self._by_cc: Dict[int, Set[str]] = {}
+        self._by_channel: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._directory: Optional[str] = None
+        self.version = 0  # bumped whenever the indexed catalog changes
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return sorted(self._entries)
+
+    def refresh(self, directory: str | Path) -> int:
+        """Sync the index with ``directory``; returns the number of files (re)indexed or dropped."""
+        seen: Dict[str, Tuple[int, int]] = {}
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".json") and entry.is_file():
+                        st = entry.stat()
+                        seen[entry.name] = (st.st_mtime_ns, st.st_size)
+        except OSError:
+            pass
+        with self._lock:
+            if self._directory != str(directory):
+                # Different library: names may collide, so start from scratch
+                self._directory = str(directory)
+                self._stamps.clear()
+                self._entries.clear()
+                self._tokens.clear()
+                self._by_cc.clear()
+                self._by_channel.clear()
+                self.version += 1
+            stale = [name for name in self._stamps if name not in seen]
+            changed = [name for name, stamp in seen.items() if self._stamps.get(name) != stamp]
+        # Parse outside the lock so concurrent searches are not blocked on disk I/O
+        parsed = {name: _entries_from_config(load_config(Path(directory) / name)) for name in changed}
+        if not stale and not changed:
+            return 0
+        with self._lock:
+            for name in stale:
+                self._drop(name)
+                self._stamps.pop(name, None)
+            for name, entries in parsed.items():
+                self._drop(name)
+                self._add(name, entries)
+                self._stamps[name] = seen[name]
+            self.version += 1
+        return len(stale) + len(changed)
+
+    def _add(self, name: str, entries: List[IndexedEncoder]) -> None:
+        self._entries[name] = entries
+        for e in entries:
+            for tok in tokenize(e.label):
+                self._tokens.setdefault(tok, set()).add(name)
+            if e.cc is not None:
+                self._by_cc.setdefault(e.cc, set()).add(name)
+                self._by_channel.setdefault(e.channel, set()).add(name)
+
+    def _drop(self, name: str) -> None:
+        entries = self._entries.pop(name, None)
+        if not entries:
+            return
+        for e in entries:
+            for tok in tokenize(e.label):
+                self._discard(self._tokens, tok, name)
+            if e.cc is not None:
+                self._discard(self._by_cc, e.cc, name)
+                self._discard(self._by_channel, e.channel, name)
+
+    @staticmethod
+    def _discard(postings: Dict[Any, Set[str]], key: Any, name: str) -> None:
+        names = postings.get(key)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del postings[key]
+
+    def search(
+        self,
+        label: Optional[str] = None,
+        cc: Optional[int] = None,
+        channel: Optional[int] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """Return presets (sorted by name) with the encoders matching every given criterion.
+
+        ``label`` matches when each of its tokens is a substring of the encoder label
+        (case-insensitive); ``cc``/``channel`` match the encoder's mapping exactly.
+        """
+        query_tokens = tokenize(label or "")
+        if label is not None and not query_tokens:
+            return []
+        with self._lock:
+            candidates: Optional[Set[str]] = None
+            for qt in query_tokens:
+                # Substring match against the vocabulary, then union the postings
+                hits: Set[str] = set()
+                for tok, names in self._tokens.items():
+                    if qt in tok:
+                        hits |= names
+                candidates = hits if candidates is None else candidates & hits
+            if cc is not None:
+                hits = self._by_cc.get(int(cc), set())
+                candidates = set(hits) if candidates is None else candidates & hits
+            if channel is not None:
+                hits = self._by_channel.get(int(channel), set())
+                candidates = set(hits) if candidates is None else candidates & hits
+            if candidates is None:
+                return []
+            results: List[Dict[str, Any]] = []
+            for name in sorted(candidates):
+                matches = [
+                    e._asdict()
+                    for e in self._entries.get(name, [])
+                    if (not query_tokens or all(qt in e.label.lower() for qt in query_tokens))
+                    and (cc is None or e.cc == int(cc))
+                    and (channel is None or (e.cc is not None and e.channel == int(channel)))
+                ]
+                if matches:
+                    results.append({"preset": name, "matches": matches})
+                    if len(results) >= limit:
+                        break
+            return results
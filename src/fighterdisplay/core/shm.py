@@ -0,0 +1,184 @@
+"""Live encoder values in a memory-mapped file, for local consumers.
+
+Layout (little-endian, fixed; ``FORMAT_VERSION`` 1)::
+
+    offset  type      field
+    0       4s        magic b"RSVL"
+    4       u16       format version (1)
+    6       u16       encoder slots per bank (128)
+    8       u16       bank slots (128)
+    10      u16       active layout: banks
+    12      u16       active layout: encoders per bank
+    14      u16       current bank (1-based)
+    16      u64       sequence counter (odd while a write is in progress)
+    24      u64       state version (the change-log version)
+    32      u64       server epoch (changes when the server restarts)
+    40      24 bytes  reserved (zero)
+    64      u8[128 * 128]  values 0-127, bank-major:
+                      offset 64 + (bank - 1) * 128 + (encoder - 1)
+
+Readers use the sequence counter as a seqlock: read it, copy what they need,
+read it again, and retry if it was odd or changed. :class:`ValueReader` does
+exactly that; other languages can follow the table above.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import threading
+from pathlib import Path
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+MAGIC = b"RSVL"
+FORMAT_VERSION = 1
+SLOTS = 128  # bank slots and encoder slots per bank
+HEADER = struct.Struct("<4sHHHHHHQQQ")
+HEADER_SIZE = 64
+SEQ_OFFSET = 16
+SEQ = struct.Struct("<Q")
+VALUES_OFFSET = HEADER_SIZE
+SIZE = HEADER_SIZE + SLOTS * SLOTS
+
+
+def _offset(bank: int, encoder: int) -> Optional[int]:
+    if 1 <= bank <= SLOTS and 1 <= encoder <= SLOTS:
+        return VALUES_OFFSET + (bank - 1) * SLOTS + (encoder - 1)
+    return None
+
+
+class ValueExport:
+    """Writer side: the server publishes values, current bank and version."""
+
+    def __init__(self, path: str | Path, epoch: int = 0) -> None:
+        self.path = Path(path)
+        self._epoch = epoch
+        self._lock = threading.Lock()
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            os.ftruncate(fd, SIZE)
+            self._map = mmap.mmap(fd, SIZE)
+        finally:
+            os.close(fd)
+        self._map[:SIZE] = bytes(SIZE)
+        HEADER.pack_into(self._map, 0, MAGIC, FORMAT_VERSION, SLOTS, SLOTS, 0, 0, 1, 0, 0, epoch)
+
+    def _begin(self) -> int:
+        seq = SEQ.unpack_from(self._map, SEQ_OFFSET)[0] + 1
+        SEQ.pack_into(self._map, SEQ_OFFSET, seq)
+        return seq
+
+    def _end(self, seq: int, version: int) -> None:
+        struct.pack_into("<Q", self._map, 24, version)
+        SEQ.pack_into(self._map, SEQ_OFFSET, seq + 1)
+
+    def write(
+        self,
+        updates: Iterable[Tuple[int, int, int]] = (),
+        current_bank: Optional[int] = None,
+        version: int = 0,
+    ) -> None:
+        """Publish changed (bank, encoder, value) entries and/or the current bank."""
+        with self._lock:
+            seq = self._begin()
+            for bank, encoder, value in updates:
+                off = _offset(int(bank), int(encoder))
+                if off is not None:
+                    self._map[off] = max(0, min(127, int(value)))
+            if current_bank is not None:
+                struct.pack_into("<H", self._map, 14, int(current_bank))
+            self._end(seq, version)
+
+    def write_all(self, dump: dict, version: int = 0) -> None:
+        """Replace everything from a :meth:`StateStore.dump` dict."""
+        values = bytearray(SLOTS * SLOTS)
+        for bank, bank_state in dump.get("banks", {}).items():
+            for enc, enc_state in bank_state.get("encoders", {}).items():
+                off = _offset(int(bank), int(enc))
+                if off is not None:
+                    values[off - VALUES_OFFSET] = max(0, min(127, int(enc_state.get("value", 0))))
+        layout = dump.get("layout", {})
+        with self._lock:
+            seq = self._begin()
+            struct.pack_into(
+                "<HHH", self._map, 10, int(layout.get("banks", 0)), int(layout.get("encoders", 0)), int(dump.get("current_bank", 1))
+            )
+            self._map[VALUES_OFFSET:SIZE] = values
+            self._end(seq, version)
+
+    def close(self, unlink: bool = True) -> None:
+        with self._lock:
+            self._map.close()
+        if unlink:
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+
+class Snapshot(NamedTuple):
+    version: int
+    epoch: int
+    current_bank: int
+    banks: int
+    encoders: int
+    values: bytes  # SLOTS * SLOTS bytes, bank-major
+
+    def value(self, bank: int, encoder: int) -> int:
+        off = _offset(bank, encoder)
+        return self.values[off - VALUES_OFFSET] if off is not None else 0
+
+
+class ValueReader:
+    """Reader side for local tools: consistent reads without HTTP or JSON.
+
+    ``read()`` copies the whole 16 KiB block; ``value()`` reads one encoder.
+    Both retry while the server is mid-write.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        with open(path, "rb") as fh:
+            self._map = mmap.mmap(fh.fileno(), SIZE, access=mmap.ACCESS_READ)
+        magic, fmt = struct.unpack_from("<4sH", self._map, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            self._map.close()
+            raise ValueError(f"not a value export (format {fmt}): {path}")
+
+    def _consistent(self, copy, retries: int):
+        for _ in range(retries):
+            before = SEQ.unpack_from(self._map, SEQ_OFFSET)[0]
+            if before & 1:
+                continue
+            data = copy()
+            if SEQ.unpack_from(self._map, SEQ_OFFSET)[0] == before:
+                return data
+        raise TimeoutError("value export kept changing during read")
+
+    def read(self, retries: int = 1000) -> Snapshot:
+        def copy():
+            header = HEADER.unpack_from(self._map, 0)
+            return header, self._map[VALUES_OFFSET:SIZE]
+
+        header, values = self._consistent(copy, retries)
+        _, _, _, _, banks, encoders, current_bank, _, version, epoch = header
+        return Snapshot(version, epoch, current_bank, banks, encoders, values)
+
+    @property
+    def sequence(self) -> int:
+        """Cheap change check: differs from the last read whenever anything was written."""
+        return SEQ.unpack_from(self._map, SEQ_OFFSET)[0]
+
+    def value(self, bank: int, encoder: int, retries: int = 1000) -> int:
+        off = _offset(bank, encoder)
+        if off is None:
+            return 0
+        return self._consistent(lambda: self._map[off], retries)
+
+    def close(self) -> None:
+        self._map.close()
+
+    def __enter__(self) -> "ValueReader":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
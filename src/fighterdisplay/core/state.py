@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import threading
-from typing import Dict, Optional
+from typing import Dict, Iterable, Optional, Tuple
 
 from pydantic import BaseModel, Field
 
@@ -12,12 +12,24 @@ class EncoderState(BaseModel):
 
 
 class BankState(BaseModel):
-    encoders: Dict[int, EncoderState] = Field(default_factory=lambda: {i: EncoderState() for i in range(1, 17)})
+    # Sparse: only encoders that have been touched or labelled are stored
+    encoders: Dict[int, EncoderState] = Field(default_factory=dict)
+
+
+class Layout(BaseModel):
+    """Controller geometry; defaults match the Midi Fighter Twister."""
+
+    banks: int = 4
+    encoders: int = 16
+    bank_select_channel: int = 4  # 1-16
+    bank_select_cc: int = 0  # first CC; bank N is selected by CC bank_select_cc + N - 1
 
 
 class AppState(BaseModel):
     current_bank: int = 1
-    banks: Dict[int, BankState] = Field(default_factory=lambda: {i: BankState() for i in range(1, 5)})
+    # Sparse: only banks with stored encoders are present
+    banks: Dict[int, BankState] = Field(default_factory=dict)
+    layout: Layout = Field(default_factory=Layout)
     last_message: Optional[dict] = None
 
 
@@ -26,14 +38,42 @@ class StateStore:
 
     def __init__(self) -> None:
         self._state = AppState()
+        # Bumped on every mutation so encoded snapshots can be cached
+        self._version = 0
         # Use RLock to avoid deadlocks when snapshot() is called from
         # other locked methods like update_encoder.
         self._lock = threading.RLock()
+        self._bank_select = self._bank_select_of(self._state.layout)
+
+    @property
+    def version(self) -> int:
+        return self._version
 
     def snapshot(self) -> AppState:
         with self._lock:
             return AppState.model_validate(self._state.model_dump())
 
+    @property
+    def current_bank(self) -> int:
+        with self._lock:
+            return self._state.current_bank
+
+    def dump(self, banks: Optional[Iterable[int]] = None) -> dict:
+        """Plain-dict snapshot (what ``snapshot().model_dump()`` returns, minus a copy).
+
+        With ``banks``, only those banks' encoders are included.
+        """
+        with self._lock:
+            if banks is None:
+                return self._state.model_dump()
+            wanted = set(banks)
+            return {
+                "current_bank": self._state.current_bank,
+                "banks": {b: bs.model_dump() for b, bs in self._state.banks.items() if b in wanted},
+                "layout": self._state.layout.model_dump(),
+                "last_message": self._state.last_message,
+            }
+
     def update_encoder(self, bank: int, encoder: int, value: int, label: Optional[str] = None) -> AppState:
         with self._lock:
             bank_state = self._state.banks.setdefault(bank, BankState())
@@ -42,9 +82,98 @@ class StateStore:
             if label is not None:
                 enc.label = label
             self._state.last_message = {"bank": bank, "encoder": encoder, "value": enc.value}
+            self._version += 1
             return self.snapshot()
 
+    def set_value(self, bank: int, encoder: int, value: int) -> int:
+        """Store one encoder value and return it clamped to 0-127; no snapshot is built."""
+        with self._lock:
+            bank_state = self._state.banks.setdefault(bank, BankState())
+            enc = bank_state.encoders.setdefault(encoder, EncoderState())
+            enc.value = max(0, min(127, int(value)))
+            self._state.last_message = {"bank": bank, "encoder": encoder, "value": enc.value}
+            self._version += 1
+            return enc.value
+
+    def set_values(self, updates: Iterable[Tuple[int, int, int]]) -> int:
+        """Apply many (bank, encoder, value) updates as one mutation; returns the new version.
+
+        Unlike :meth:`update_encoder` no snapshot is built, so this stays cheap
+        for scene morphs touching every encoder at a high tick rate.
+        """
+        with self._lock:
+            last = None
+            for bank, encoder, value in updates:
+                bank_state = self._state.banks.setdefault(bank, BankState())
+                enc = bank_state.encoders.setdefault(encoder, EncoderState())
+                enc.value = max(0, min(127, int(value)))
+                last = (bank, encoder, enc.value)
+            if last is not None:
+                self._state.last_message = {"bank": last[0], "encoder": last[1], "value": last[2]}
+                self._version += 1
+            return self._version
+
+    def set_labels(self, labels_by_bank: Dict[int, Dict[int, str]], replace: bool = False) -> int:
+        """Set many encoder labels in one mutation, keeping values; returns the new version.
+
+        With ``replace``, labels of encoders missing from ``labels_by_bank`` are
+        cleared, and encoders left unlabelled at value 0 are dropped (as are banks
+        left empty) so the sparse store only holds what the current preset defines.
+        No snapshot is built, so loading a preset stays linear in its size.
+        """
+        with self._lock:
+            if replace:
+                for bank in list(self._state.banks):
+                    wanted = labels_by_bank.get(bank, {})
+                    encoders = self._state.banks[bank].encoders
+                    for enc_idx in list(encoders):
+                        enc = encoders[enc_idx]
+                        if enc.label and not wanted.get(enc_idx):
+                            enc.label = ""
+                        if not enc.label and not enc.value and enc_idx not in wanted:
+                            del encoders[enc_idx]
+                    if not encoders and bank not in labels_by_bank:
+                        del self._state.banks[bank]
+            for bank, encs in labels_by_bank.items():
+                bank_state = self._state.banks.setdefault(bank, BankState())
+                for enc_idx, label in encs.items():
+                    bank_state.encoders.setdefault(enc_idx, EncoderState()).label = label
+            self._version += 1
+            return self._version
+
     def set_bank(self, bank: int) -> AppState:
         with self._lock:
             self._state.current_bank = bank
+            self._version += 1
+            return self.snapshot()
+
+    @staticmethod
+    def _bank_select_of(layout: Layout) -> Tuple[int, int, int]:
+        return (layout.bank_select_channel - 1, layout.bank_select_cc, layout.banks)
+
+    @property
+    def bank_select(self) -> Tuple[int, int, int]:
+        """(0-based channel, first CC, bank count) of the current layout.
+
+        Kept as a plain tuple whenever the layout is set, so the per-CC input
+        path reads it without the lock or a model copy.
+        """
+        return self._bank_select
+
+    def layout(self) -> Layout:
+        with self._lock:
+            return self._state.layout.model_copy()
+
+    def set_layout(self, **fields: int) -> AppState:
+        """Replace the controller geometry, keeping the current bank in range.
+
+        Stored banks beyond the new bank count are dropped.
+        """
+        with self._lock:
+            self._state.layout = Layout(**fields)
+            self._bank_select = self._bank_select_of(self._state.layout)
+            for bank in [b for b in self._state.banks if b > self._state.layout.banks]:
+                del self._state.banks[bank]
+            self._state.current_bank = max(1, min(self._state.layout.banks, self._state.current_bank))
+            self._version += 1
             return self.snapshot()
@@ -0,0 +1,71 @@
+from __future__ import annotations
+
+from typing import Any, Dict, FrozenSet, Optional
+
+
+class Subscription:
+    """What one WebSocket client wants pushed, and how often.
+
+    Clients send ``{"type": "subscribe", ...}`` with any of:
+    ``banks`` – a list of bank numbers, ``"current"`` (follow the current bank)
+    or ``"all"``; ``visible`` – false while the page is hidden; ``max_fps`` –
+    the highest heartbeat rate the client wants. Omitted fields keep their value.
+    """
+
+    def __init__(self) -> None:
+        self.banks: Optional[FrozenSet[int]] = None  # None: every bank
+        self.current_only = False
+        self.visible = True
+        self.max_fps: Optional[float] = None
+        self._next_due = 0.0
+
+    def update(self, msg: Dict[str, Any]) -> None:
+        banks = msg.get("banks")
+        if banks == "current":
+            self.current_only, self.banks = True, None
+        elif banks == "all":
+            self.current_only, self.banks = False, None
+        elif isinstance(banks, list):
+            try:
+                self.current_only, self.banks = False, frozenset(int(b) for b in banks)
+            except Exception:
+                pass
+        if "visible" in msg:
+            self.visible = bool(msg["visible"])
+            # Becoming visible should not wait out a long hidden-rate interval
+            if self.visible:
+                self._next_due = 0.0
+        if "max_fps" in msg:
+            try:
+                fps = float(msg["max_fps"])
+                self.max_fps = fps if fps > 0 else None
+            except Exception:
+                pass
+
+    def describe(self) -> Dict[str, Any]:
+        banks: Any = "current" if self.current_only else ("all" if self.banks is None else sorted(self.banks))
+        return {"banks": banks, "visible": self.visible, "max_fps": self.max_fps}
+
+    def banks_for(self, current_bank: int) -> Optional[FrozenSet[int]]:
+        """Banks to include in this client's state, or None for all of them."""
+        if self.current_only:
+            return frozenset((current_bank,))
+        return self.banks
+
+    def keeps_up_with(self, hz: float) -> bool:
+        """True if this client wants a stream of deltas pushed at ``hz``.
+
+        Hidden clients and those capped below ``hz`` rely on heartbeats instead.
+        """
+        return self.visible and (self.max_fps is None or self.max_fps >= hz)
+
+    def heartbeat_due(self, now: float, heartbeat_hz: float, hidden_hz: float) -> bool:
+        """True (and start a new interval) if a periodic update may be sent at ``now``."""
+        rate = heartbeat_hz if self.visible else min(heartbeat_hz, hidden_hz)
+        if self.max_fps is not None:
+            rate = min(rate, self.max_fps)
+        if now < self._next_due:
+            return False
+        # Small slack so jitter in the heartbeat loop does not skip every other tick
+        self._next_due = now + 0.9 / max(rate, 1e-6)
+        return True
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+
+class PhaseTimer:
+    """Record named startup phases as offsets (seconds) from a common origin."""
+
+    def __init__(self, origin: Optional[float] = None) -> None:
+        self.origin = time.perf_counter() if origin is None else origin
+        self._phases: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _now(self) -> float:
+        return time.perf_counter() - self.origin
+
+    def start(self, name: str) -> None:
+        with self._lock:
+            self._phases.setdefault(name, {"start": self._now()})
+
+    def end(self, name: str) -> None:
+        """Close a phase; one that was never started is measured from the origin."""
+        with self._lock:
+            entry = self._phases.setdefault(name, {"start": 0.0})
+            if "end" not in entry:
+                entry["end"] = self._now()
+                entry["duration"] = entry["end"] - entry["start"]
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def mark(self, name: str) -> None:
+        """Record a one-off milestone; only the first call counts."""
+        with self._lock:
+            if name not in self._phases:
+                now = self._now()
+                self._phases[name] = {"start": now, "end": now, "duration": 0.0}
+
+    def as_dict(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {name: dict(entry) for name, entry in self._phases.items()}
@@ -1,8 +1,16 @@
 from __future__ import annotations
 
-from typing import Callable, List, Optional
+import functools
+import os
+from typing import Callable, Collection, Iterable, List, Optional, Tuple
 
+from .sysex import SysexCodec
 
+
+CcTuple = Tuple[int, int, int]  # (channel 0-15, control, value)
+
+
+@functools.lru_cache(maxsize=None)
 def _safe_import_mido():
     try:
         import mido  # type: ignore
@@ -12,7 +20,33 @@ def _safe_import_mido():
         return None
 
 
+@functools.lru_cache(maxsize=None)
+def _safe_import_rtmidi():
+    try:
+        import rtmidi  # type: ignore
+
+        return rtmidi
+    except Exception:
+        return None
+
+
+def _virtual_backend():
+    """The in-process virtual backend when MIDI_BACKEND=virtual, else None."""
+    if os.getenv("MIDI_BACKEND", "").strip().lower() != "virtual":
+        return None
+    from .virtual import VIRTUAL
+
+    return VIRTUAL
+
+
+def _rtmidi_backend():
+    return _virtual_backend() or _safe_import_rtmidi()
+
+
 def list_input_ports() -> List[str]:
+    virtual = _virtual_backend()
+    if virtual is not None:
+        return virtual.input_names()
     mido = _safe_import_mido()
     if not mido:
         return []
@@ -23,6 +57,9 @@ def list_input_ports() -> List[str]:
 
 
 def list_output_ports() -> List[str]:
+    virtual = _virtual_backend()
+    if virtual is not None:
+        return virtual.output_names()
     mido = _safe_import_mido()
     if not mido:
         return []
@@ -44,6 +81,11 @@ def open_input(port_name: str, callback: Callable[[dict], None]):
 
     The callback receives a minimal dict: {"type", "control", "value", ...}
     """
+    if _virtual_backend() is not None:
+        return open_input_raw(
+            port_name,
+            lambda cc: callback({"type": "control_change", "channel": cc[0], "control": cc[1], "value": cc[2]}),
+        )
     mido = _safe_import_mido()
     if not mido:
         return None
@@ -57,6 +99,8 @@ def open_input(port_name: str, callback: Callable[[dict], None]):
                 data["value"] = getattr(msg, "value")
             if hasattr(msg, "channel"):
                 data["channel"] = getattr(msg, "channel")
+            if msg.type == "sysex":
+                data["data"] = bytes((0xF0, *msg.data, 0xF7))
             callback(data)
 
         inp = mido.open_input(port_name, callback=_on_msg)
@@ -66,6 +110,8 @@ def open_input(port_name: str, callback: Callable[[dict], None]):
 
 
 def open_output(port_name: str):
+    if _virtual_backend() is not None:
+        return open_output_raw(port_name)
     mido = _safe_import_mido()
     if not mido:
         return None
@@ -76,6 +122,8 @@ def open_output(port_name: str):
 
 
 def send_cc(output, control: int, value: int, channel: int = 0) -> bool:
+    if isinstance(output, RawOutput):
+        return output.write((cc_frame(control, value, channel),))
     mido = _safe_import_mido()
     if not (mido and output):
         return False
@@ -85,3 +133,178 @@ def send_cc(output, control: int, value: int, channel: int = 0) -> bool:
         return True
     except Exception:
         return False
+
+
+def send_sysex(output, frame: bytes) -> bool:
+    """Send one complete SysEx message (including the F0/F7 framing)."""
+    if isinstance(output, RawOutput):
+        return output.write((bytes(frame),))
+    mido = _safe_import_mido()
+    if not (mido and output):
+        return False
+    try:
+        output.send(mido.Message("sysex", data=bytes(frame[1:-1])))
+        return True
+    except Exception:
+        return False
+
+
+def sysex_codec(output) -> Optional[SysexCodec]:
+    """The SysEx codec spoken by the device behind an opened output, or None.
+
+    Only ports that declare one (the virtual backend's) have a codec so far;
+    configuration transfers to anything else are refused rather than sending
+    frames the device does not understand.
+    """
+    if isinstance(output, RawOutput):
+        return output.sysex_codec()
+    return None
+
+
+def send_cc_batch(output, messages: Iterable[CcTuple]) -> bool:
+    """Send several (channel, control, value) CCs, in one write where supported."""
+    if isinstance(output, RawOutput):
+        return output.write([cc_frame(control, value, channel) for channel, control, value in messages])
+    ok = True
+    for channel, control, value in messages:
+        ok = send_cc(output, control, value, channel) and ok
+    return ok
+
+
+# -------- Raw-byte fast path (python-rtmidi, no mido Message objects) --------
+
+# Status bytes for Control Change on channels 0..15
+_CC_STATUS = tuple(0xB0 | ch for ch in range(16))
+
+
+def cc_frame(control: int, value: int, channel: int = 0) -> bytes:
+    """Return the 3-byte Control Change frame."""
+    return bytes((_CC_STATUS[channel & 0x0F], control & 0x7F, value & 0x7F))
+
+
+def parse_cc(data) -> Optional[CcTuple]:
+    """Parse raw MIDI bytes into (channel, control, value) if it is a CC message."""
+    if len(data) != 3:
+        return None
+    status = data[0]
+    if status & 0xF0 != 0xB0:
+        return None
+    return (status & 0x0F, data[1], data[2])
+
+
+def _rtmidi_port_index(port, port_name: str) -> Optional[int]:
+    names = port.get_ports()
+    if port_name in names:
+        return names.index(port_name)
+    # Backends may decorate names (client numbers etc.); fall back to Twister match
+    match = find_twister_port(names) if "midi fighter twister" in port_name.lower() else None
+    return names.index(match) if match else None
+
+
+def open_input_raw(
+    port_name: str,
+    callback: Callable[[CcTuple], None],
+    channels: Optional[Collection[int]] = None,
+    sysex: Optional[Callable[[bytes], None]] = None,
+):
+    """Open a MIDI input via python-rtmidi and deliver CC messages as tuples.
+
+    The callback receives ``(channel, control, value)`` with channel 0..15. When
+    ``channels`` is given, CCs on other channels are dropped before the callback;
+    the container is consulted on every message, so callers may update it in place.
+    With ``sysex``, complete SysEx messages (F0 ... F7) are passed to it as bytes;
+    otherwise rtmidi keeps filtering them out.
+    Returns None when python-rtmidi or the port is unavailable.
+    """
+    rtmidi = _rtmidi_backend()
+    if not rtmidi:
+        return None
+    try:
+        inp = rtmidi.MidiIn()
+        index = _rtmidi_port_index(inp, port_name)
+        if index is None:
+            return None
+
+        def _on_raw(event, _data=None):
+            data = event[0]
+            # Inline parse_cc: this runs once per incoming message
+            if len(data) != 3 or data[0] & 0xF0 != 0xB0:
+                if sysex is not None and data and data[0] == 0xF0:
+                    sysex(bytes(data))
+                return
+            channel = data[0] & 0x0F
+            if channels is not None and channel not in channels:
+                return
+            callback((channel, data[1], data[2]))
+
+        inp.open_port(index)
+        if sysex is not None:
+            inp.ignore_types(sysex=False)
+        inp.set_callback(_on_raw)
+        return RawInput(inp)
+    except Exception:
+        return None
+
+
+def open_output_raw(port_name: str):
+    """Open a MIDI output via python-rtmidi for raw frame writes, or None."""
+    rtmidi = _rtmidi_backend()
+    if not rtmidi:
+        return None
+    try:
+        out = rtmidi.MidiOut()
+        index = _rtmidi_port_index(out, port_name)
+        if index is None:
+            return None
+        out.open_port(index)
+        return RawOutput(out)
+    except Exception:
+        return None
+
+
+class RawInput:
+    """Handle for an rtmidi input opened by :func:`open_input_raw`."""
+
+    def __init__(self, port) -> None:
+        self._port = port
+
+    def close(self) -> None:
+        try:
+            self._port.cancel_callback()
+        except Exception:
+            pass
+        self._port.close_port()
+
+
+class RawOutput:
+    """Writes prebuilt MIDI frames to an rtmidi-style output.
+
+    Ports exposing ``send_bytes`` accept a concatenated buffer, so a batch of
+    frames costs one write; plain rtmidi ``send_message`` takes one message per
+    call, so frames are written back to back.
+    """
+
+    def __init__(self, port) -> None:
+        self._port = port
+        self._send_bytes = getattr(port, "send_bytes", None)
+
+    def write(self, frames: Iterable[bytes]) -> bool:
+        try:
+            if self._send_bytes is not None:
+                buf = b"".join(frames)
+                if buf:
+                    self._send_bytes(buf)
+                return True
+            send = self._port.send_message
+            for frame in frames:
+                send(frame)
+            return True
+        except Exception:
+            return False
+
+    def sysex_codec(self) -> Optional[SysexCodec]:
+        codec = getattr(self._port, "sysex_codec", None)
+        return codec() if codec is not None else None
+
+    def close(self) -> None:
+        self._port.close_port()
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Tuple, Union
+
+from .device import CcTuple
+
+Outgoing = Union[CcTuple, bytes]  # a CC, or one complete SysEx frame
+
+
+class OutputScheduler:
+    """Paces CC output to the device with a token bucket.
+
+    Two lanes share the budget: live traffic (LED echo, bank select) is always
+    served first; bulk resync bursts use whatever budget is left. The scheduler
+    remembers the last value sent to, or received from, each (channel, control)
+    so bulk entries the device already shows are skipped for free.
+
+    The live lane holds at most ``max_live`` messages; when a flood outruns
+    the output rate the oldest are dropped (and counted in ``dropped``), since
+    only the latest value per control matters to the LED rings.
+
+    SysEx frames (device configuration transfers) are sent in order from the
+    bulk budget, ahead of resync values. The budget counts 3-byte CC
+    messages, so a frame costs its length / 3; a frame larger than the burst
+    goes out once the bucket is full and leaves it in debt, which keeps the
+    combined byte rate on the link at ``rate`` * 3.
+
+    ``on_ready``, when set, is called (from the pushing thread, outside the
+    lock) whenever something is queued while the scheduler was empty, so a
+    pump can sleep instead of polling an idle queue.
+    """
+
+    def __init__(self, rate: float = 2000.0, burst: int = 32, max_live: int = 1024) -> None:
+        self.rate = max(1.0, float(rate))  # messages per second
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._stamp: Optional[float] = None
+        self._live: Deque[CcTuple] = deque(maxlen=max(1, int(max_live)))
+        self.dropped = 0
+        # Pending bulk values keyed by (channel, control), in push order
+        self._bulk: Dict[Tuple[int, int], int] = {}
+        self._shown: Dict[Tuple[int, int], int] = {}
+        self._sysex: Deque[bytes] = deque()
+        self._lock = threading.Lock()
+        self.on_ready: Optional[Callable[[], None]] = None
+
+    def _idle(self) -> bool:
+        return not (self._live or self._bulk or self._sysex)
+
+    def _ready(self) -> None:
+        callback = self.on_ready
+        if callback is not None:
+            callback()
+
+    def push_live(self, channel: int, control: int, value: int) -> None:
+        with self._lock:
+            idle = self._idle()
+            if len(self._live) == self._live.maxlen:
+                self.dropped += 1
+            self._live.append((channel, control, value))
+            # A live write supersedes any pending bulk value for the same control
+            self._bulk.pop((channel, control), None)
+        if idle:
+            self._ready()
+
+    def push_bulk(self, messages: Iterable[CcTuple]) -> int:
+        """Queue a resync burst; returns how many values differ from the device."""
+        queued = 0
+        with self._lock:
+            idle = self._idle()
+            for channel, control, value in messages:
+                key = (channel, control)
+                if self._shown.get(key) == value:
+                    self._bulk.pop(key, None)
+                    continue
+                self._bulk.pop(key, None)
+                self._bulk[key] = value
+                queued += 1
+        if idle and queued:
+            self._ready()
+        return queued
+
+    def push_sysex(self, frame: bytes) -> bool:
+        """Queue one complete SysEx frame (F0 ... F7) behind earlier ones."""
+        with self._lock:
+            idle = self._idle()
+            self._sysex.append(bytes(frame))
+        if idle:
+            self._ready()
+        return True
+
+    def mark_shown(self, channel: int, control: int, value: int) -> None:
+        """Record a value the device displays without us sending it (e.g. input)."""
+        with self._lock:
+            self._shown[(channel, control)] = value
+
+    def forget(self) -> None:
+        """Drop device knowledge, e.g. after the port was (re)opened."""
+        with self._lock:
+            self._shown.clear()
+
+    def pending(self) -> int:
+        with self._lock:
+            return len(self._live) + len(self._bulk) + len(self._sysex)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "live": len(self._live),
+                "live_limit": self._live.maxlen or 0,
+                "bulk": len(self._bulk),
+                "sysex": len(self._sysex),
+                "dropped": self.dropped,
+            }
+
+    def take(self, now: Optional[float] = None) -> List[Outgoing]:
+        """Return the messages allowed out right now, live lane first.
+
+        CCs come back as (channel, control, value) tuples, SysEx frames as bytes.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if self._stamp is not None:
+                # A clock that went backwards must not leave the bucket in debt
+                elapsed = max(0.0, now - self._stamp)
+                self._tokens = min(float(self.burst), self._tokens + elapsed * self.rate)
+            self._stamp = now
+            out: List[Outgoing] = []
+            spent = 0.0
+            while self._tokens - spent >= 1 and self._live:
+                msg = self._live.popleft()
+                self._shown[(msg[0], msg[1])] = msg[2]
+                out.append(msg)
+                spent += 1
+            while self._sysex:
+                cost = len(self._sysex[0]) / 3.0
+                if self._tokens - spent < min(cost, float(self.burst)):
+                    break
+                out.append(self._sysex.popleft())
+                spent += cost
+            # A frame still waiting for budget holds back resyncs, or they would starve it
+            while self._tokens - spent >= 1 and self._bulk and not self._sysex:
+                key = next(iter(self._bulk))
+                value = self._bulk.pop(key)
+                if self._shown.get(key) == value:
+                    continue
+                self._shown[key] = value
+                out.append((key[0], key[1], value))
+                spent += 1
+            self._tokens -= spent
+            return out
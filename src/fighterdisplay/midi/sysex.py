@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+SYSEX_START = 0xF0
+SYSEX_END = 0xF7
+
+# What a codec's parse() reports for a device reply
+DUMP_DATA = 0x02  # seq = chunk index, data = chunk bytes
+DUMP_END = 0x03  # seq = chunk count
+ACK = 0x05  # seq echoes the acknowledged chunk (or the commit)
+NAK = 0x06  # chunk was corrupt or could not be stored
+
+MAX_CHUNKS = 1 << 14  # 14-bit sequence numbers
+
+Message = Tuple[int, int, bytes]  # (kind, seq, data)
+
+
+class SysexError(Exception):
+    """A transfer failed after exhausting its retries."""
+
+
+def pack7(data: bytes) -> bytes:
+    """Pack 8-bit data into 7-bit bytes: each group of 7 gets a leading byte of high bits."""
+    out = bytearray()
+    for i in range(0, len(data), 7):
+        group = data[i:i + 7]
+        high = 0
+        for j, b in enumerate(group):
+            high |= ((b >> 7) & 1) << j
+        out.append(high)
+        out.extend(b & 0x7F for b in group)
+    return bytes(out)
+
+
+def unpack7(data: bytes) -> bytes:
+    out = bytearray()
+    for i in range(0, len(data), 8):
+        high = data[i]
+        out.extend(b | (((high >> j) & 1) << 7) for j, b in enumerate(data[i + 1:i + 8]))
+    return bytes(out)
+
+
+class SysexCodec:
+    """How one device family frames a configuration transfer.
+
+    :class:`SysexTransfer` only deals in chunks, sequence numbers and replies;
+    a codec turns those into the device's SysEx messages and back. Subclass
+    it for a real device's command set.
+    """
+
+    chunk_size = 112  # configuration bytes per written chunk
+
+    def dump_request(self) -> bytes:
+        raise NotImplementedError
+
+    def write_chunk(self, seq: int, data: bytes) -> bytes:
+        raise NotImplementedError
+
+    def commit(self, total: int) -> bytes:
+        raise NotImplementedError
+
+    def parse(self, frame: bytes) -> Optional[Message]:
+        """(DUMP_DATA | DUMP_END | ACK | NAK, seq, data) for a device reply, else None."""
+        raise NotImplementedError
+
+
+class LoopbackCodec(SysexCodec):
+    """Protocol spoken by the virtual device (:class:`~fighterdisplay.midi.virtual.SysexStandIn`).
+
+    No hardware implements it; it exercises the transfer engine until a codec
+    for the Twister's own command set exists. All data bytes are 7-bit::
+
+        F0 7D <cmd> <seq hi> <seq lo> <payload ...> <checksum> F7
+
+    0x7D is the MIDI manufacturer ID reserved for non-commercial use; the
+    checksum is the sum of cmd, seq and payload bytes, masked to 7 bits.
+    Payloads carry 8-bit data packed 7-in-8 (see :func:`pack7`).
+    """
+
+    MANUFACTURER = 0x7D
+    DUMP_REQUEST = 0x01  # host -> device
+    DUMP_DATA = DUMP_DATA  # device -> host
+    DUMP_END = DUMP_END  # device -> host
+    WRITE = 0x04  # host -> device, seq = chunk index
+    ACK = ACK  # device -> host
+    NAK = NAK  # device -> host
+    COMMIT = 0x07  # host -> device, seq = chunk count
+
+    def frame(self, cmd: int, seq: int = 0, payload: bytes = b"") -> bytes:
+        body = bytes((cmd & 0x7F, (seq >> 7) & 0x7F, seq & 0x7F)) + payload
+        return bytes((SYSEX_START, self.MANUFACTURER)) + body + bytes((sum(body) & 0x7F, SYSEX_END))
+
+    def unframe(self, frame: bytes) -> Optional[Message]:
+        """(cmd, seq, raw payload) for a well-formed frame in either direction, else None."""
+        if len(frame) < 7 or frame[0] != SYSEX_START or frame[-1] != SYSEX_END or frame[1] != self.MANUFACTURER:
+            return None
+        body = frame[2:-2]
+        if sum(body) & 0x7F != frame[-2]:
+            return None
+        return body[0], (body[1] << 7) | body[2], bytes(body[3:])
+
+    def dump_request(self) -> bytes:
+        return self.frame(self.DUMP_REQUEST)
+
+    def write_chunk(self, seq: int, data: bytes) -> bytes:
+        return self.frame(self.WRITE, seq, pack7(data))
+
+    def commit(self, total: int) -> bytes:
+        return self.frame(self.COMMIT, total)
+
+    def parse(self, frame: bytes) -> Optional[Message]:
+        msg = self.unframe(frame)
+        if msg is None or msg[0] not in (DUMP_DATA, DUMP_END, ACK, NAK):
+            return None
+        kind, seq, payload = msg
+        return kind, seq, unpack7(payload) if kind == DUMP_DATA else b""
+
+
+class SysexTransfer:
+    """Blocking SysEx dump/restore over one device connection.
+
+    ``send`` hands one complete SysEx frame to the device (or to an output
+    scheduler that paces it); ``codec`` frames requests in the device's own
+    command set (see :func:`~fighterdisplay.midi.device.sysex_codec`). Replies
+    from the device are handed to :meth:`feed` (from any thread, typically the
+    MIDI input callback) and decoded by ``codec``. With ``rate`` the engine paces its own output to
+    that many bytes per second; leave it None when ``send`` is already paced.
+    Restores keep up to ``window`` chunks in flight, so the link stays busy
+    without overrunning the device. Chunks that are NAKed or not acknowledged
+    within ``ack_timeout`` are resent up to ``retries`` times. ``progress`` is
+    called with (chunks done, chunks total).
+
+    Every call blocks; servers run it in a worker thread.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[bytes], bool],
+        codec: SysexCodec,
+        rate: Optional[float] = None,
+        window: int = 4,
+        ack_timeout: float = 0.5,
+        retries: int = 5,
+        progress: Optional[Callable[[int, int], None]] = None,
+    ) -> None:
+        self._send = send
+        self.codec = codec
+        self.rate = max(1.0, float(rate)) if rate else None
+        self.window = max(1, int(window))
+        self.ack_timeout = max(0.001, float(ack_timeout))
+        self.retries = max(0, int(retries))
+        self._progress = progress
+        self._inbox: "queue.Queue[Message]" = queue.Queue()
+        self._next_send = 0.0
+        self._lock = threading.Lock()  # one transfer at a time
+        self.retransmits = 0
+        self.bytes_sent = 0
+
+    def feed(self, frame: bytes) -> None:
+        msg = self.codec.parse(bytes(frame))
+        if msg is not None:
+            self._inbox.put(msg)
+
+    def _drain(self) -> None:
+        while True:
+            try:
+                self._inbox.get_nowait()
+            except queue.Empty:
+                return
+
+    def _write(self, frame: bytes) -> None:
+        if self.rate is not None:
+            # Byte-rate pacing on absolute deadlines
+            now = time.monotonic()
+            if self._next_send > now:
+                time.sleep(self._next_send - now)
+                now = self._next_send
+            self._next_send = max(now, self._next_send) + len(frame) / self.rate
+        if not self._send(frame):
+            raise SysexError("device write failed")
+        self.bytes_sent += len(frame)
+
+    def _report(self, done: int, total: int) -> None:
+        if self._progress is not None:
+            try:
+                self._progress(done, total)
+            except Exception:
+                pass
+
+    def dump(self) -> bytes:
+        """Request the device configuration and return it."""
+        with self._lock:
+            for _ in range(self.retries + 1):
+                self._drain()
+                self._write(self.codec.dump_request())
+                chunks: Dict[int, bytes] = {}
+                total: Optional[int] = None
+                while True:
+                    try:
+                        cmd, seq, data = self._inbox.get(timeout=self.ack_timeout)
+                    except queue.Empty:
+                        break  # device went quiet: retry the whole dump
+                    if cmd == DUMP_DATA:
+                        chunks[seq] = data
+                        self._report(len(chunks), max(total or 0, len(chunks)))
+                    elif cmd == DUMP_END:
+                        total = seq
+                        break
+                if total is not None and len(chunks) == total and all(i in chunks for i in range(total)):
+                    self._report(total, total)
+                    return b"".join(chunks[i] for i in range(total))
+                self.retransmits += 1
+            raise SysexError("device dump incomplete")
+
+    def restore(self, data: bytes) -> None:
+        """Write ``data`` to the device in acknowledged chunks, then commit it."""
+        size = self.codec.chunk_size
+        chunks = [data[i:i + size] for i in range(0, len(data), size)]
+        total = len(chunks)
+        if total >= MAX_CHUNKS:
+            raise SysexError("configuration too large")
+        frames = [self.codec.write_chunk(seq, chunk) for seq, chunk in enumerate(chunks)]
+        with self._lock:
+            self._drain()
+            pending: Deque[int] = deque(range(total))
+            inflight: Dict[int, float] = {}  # seq -> sent at
+            attempts: Dict[int, int] = {}
+            done = 0
+            self._report(0, total)
+            while done < total:
+                while pending and len(inflight) < self.window:
+                    seq = pending.popleft()
+                    attempts[seq] = attempts.get(seq, 0) + 1
+                    if attempts[seq] > self.retries + 1:
+                        raise SysexError(f"chunk {seq} not acknowledged after {self.retries} retries")
+                    self._write(frames[seq])
+                    inflight[seq] = time.monotonic()
+                wait = min(inflight.values()) + self.ack_timeout - time.monotonic()
+                try:
+                    cmd, seq, _ = self._inbox.get(timeout=max(0.0, wait))
+                except queue.Empty:
+                    now = time.monotonic()
+                    for seq, sent in sorted(inflight.items()):
+                        if now - sent >= self.ack_timeout:
+                            del inflight[seq]
+                            pending.appendleft(seq)
+                            self.retransmits += 1
+                    continue
+                if seq not in inflight:
+                    continue  # late reply for a chunk already resent or acknowledged
+                del inflight[seq]
+                if cmd == ACK:
+                    done += 1
+                    self._report(done, total)
+                elif cmd == NAK:
+                    pending.appendleft(seq)
+                    self.retransmits += 1
+            self._commit(total)
+
+    def _commit(self, total: int) -> None:
+        for _ in range(self.retries + 1):
+            self._write(self.codec.commit(total))
+            deadline = time.monotonic() + self.ack_timeout
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    cmd, seq, _ = self._inbox.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if seq == total and cmd == ACK:
+                    return
+                if seq == total and cmd == NAK:
+                    raise SysexError("device rejected the configuration")
+            self.retransmits += 1
+        raise SysexError("commit not acknowledged")
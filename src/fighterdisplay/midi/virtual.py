@@ -0,0 +1,320 @@
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Collection, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .device import CcTuple, cc_frame, parse_cc
+from .sysex import LoopbackCodec, pack7, unpack7
+
+
+TWISTER = "Midi Fighter Twister"
+# 31250 baud, 10 bits per byte: what a 5-pin DIN link carries
+DIN_BYTES_PER_SECOND = 3125.0
+
+
+class VirtualDevice:
+    """An in-process controller with one input and one output port named ``name``.
+
+    ``inject()`` delivers messages to whoever opened the input port, as if the
+    device sent them; ``play()`` does so at a fixed rate. Frames written to the
+    output port are captured with a timestamp. With ``bandwidth`` (bytes per
+    second) the timestamp is when the frame would have finished crossing a link
+    that slow, so pacing can be measured without real time passing. The
+    ``clock`` is injectable for fully deterministic tests. SysEx written to the
+    device is also handed to ``sysex_handler`` (see :class:`SysexStandIn`).
+    """
+
+    def __init__(
+        self,
+        name: str = TWISTER,
+        bandwidth: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.bandwidth = bandwidth
+        self.clock = clock
+        self.connected = True
+        self.captured: List[Tuple[float, bytes]] = []
+        self.injected = 0
+        # Bumped on disconnect so handles opened before it stay dead, like real ports
+        self.generation = 0
+        self.sysex_handler: Optional[Callable[[bytes], None]] = None
+        self._inputs: List["VirtualMidiIn"] = []
+        self._link_free = 0.0
+        self._lock = threading.Lock()
+
+    # -- device side ------------------------------------------------------
+
+    def inject(self, message: bytes | Sequence[int] | CcTuple) -> bool:
+        """Send one message from the device; a 3-tuple is taken as (channel, control, value)."""
+        if isinstance(message, tuple) and len(message) == 3 and not isinstance(message, bytes):
+            data = list(cc_frame(message[1], message[2], message[0]))
+        else:
+            data = list(message)
+        with self._lock:
+            if not self.connected:
+                return False
+            inputs = list(self._inputs)
+            self.injected += 1
+        for port in inputs:
+            port._deliver(data)
+        return True
+
+    def play(self, messages: Iterable, rate: float, background: bool = False):
+        """Inject ``messages`` at ``rate`` per second on absolute deadlines (no drift).
+
+        Returns the number injected, or the started thread with ``background``.
+        """
+        interval = 1.0 / float(rate)
+
+        def run() -> int:
+            count = 0
+            deadline = time.perf_counter()
+            for message in messages:
+                delay = deadline - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                if self.inject(message):
+                    count += 1
+                deadline += interval
+            return count
+
+        if background:
+            thread = threading.Thread(target=run, name=f"virtual-midi-{self.name}", daemon=True)
+            thread.start()
+            return thread
+        return run()
+
+    def disconnect(self) -> None:
+        """Simulate unplugging: ports disappear and open handles stop working."""
+        with self._lock:
+            self.connected = False
+            self.generation += 1
+            self._inputs.clear()
+
+    def reconnect(self) -> None:
+        with self._lock:
+            self.connected = True
+
+    def received(self) -> List[Tuple[float, CcTuple]]:
+        """Captured output parsed as (timestamp, (channel, control, value)) CCs."""
+        with self._lock:
+            frames = list(self.captured)
+        return [(t, cc) for t, frame in frames for cc in [parse_cc(frame)] if cc is not None]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.captured.clear()
+            self._link_free = 0.0
+
+    # -- port side ----------------------------------------------------------
+
+    def _attach(self, port: "VirtualMidiIn") -> int:
+        with self._lock:
+            if not self.connected:
+                raise OSError(f"{self.name}: not connected")
+            self._inputs.append(port)
+            return self.generation
+
+    def _detach(self, port: "VirtualMidiIn") -> None:
+        with self._lock:
+            if port in self._inputs:
+                self._inputs.remove(port)
+
+    def _receive(self, data: bytes, generation: int) -> None:
+        with self._lock:
+            if not self.connected or generation != self.generation:
+                raise OSError(f"{self.name}: port disconnected")
+            now = self.clock()
+            if self.bandwidth:
+                # Serialise frames on the simulated link
+                start = max(now, self._link_free)
+                self._link_free = start + len(data) / self.bandwidth
+                now = self._link_free
+            self.captured.append((now, bytes(data)))
+            handler = self.sysex_handler if data[:1] == b"\xf0" else None
+        # Outside the lock: the handler answers through inject()
+        if handler is not None:
+            handler(bytes(data))
+
+
+class SysexStandIn:
+    """Answers the :class:`~fighterdisplay.midi.sysex.LoopbackCodec` protocol for a virtual device.
+
+    ``memory`` is the device configuration returned by dumps and replaced by
+    committed restores. Written chunks whose sequence number is in ``drop`` are
+    lost once (no reply) and those in ``nak`` are refused once, to exercise
+    the host's retries. ``ack_delay`` postpones every acknowledgement.
+    """
+
+    def __init__(
+        self,
+        device: VirtualDevice,
+        memory: bytes = b"",
+        chunk_size: int = 112,
+        drop: Collection[int] = (),
+        nak: Collection[int] = (),
+        ack_delay: float = 0.0,
+    ) -> None:
+        self.device = device
+        self.memory = bytes(memory)
+        self.chunk_size = chunk_size
+        self.drop = set(drop)
+        self.nak = set(nak)
+        self.ack_delay = ack_delay
+        self.writes = 0
+        self._staged: Dict[int, bytes] = {}
+        self._codec = LoopbackCodec()
+        device.sysex_handler = self
+
+    def _reply(self, cmd: int, seq: int, payload: bytes = b"") -> None:
+        codec = self._codec
+        frame = codec.frame(cmd, seq, payload)
+        if self.ack_delay > 0 and cmd in (codec.ACK, codec.NAK):
+            timer = threading.Timer(self.ack_delay, self.device.inject, args=(frame,))
+            timer.daemon = True
+            timer.start()
+        else:
+            self.device.inject(frame)
+
+    def __call__(self, frame: bytes) -> None:
+        codec = self._codec
+        msg = codec.unframe(frame)
+        if msg is None:
+            return
+        cmd, seq, payload = msg
+        if cmd == codec.DUMP_REQUEST:
+            chunks = [self.memory[i:i + self.chunk_size] for i in range(0, len(self.memory), self.chunk_size)]
+            for index, chunk in enumerate(chunks):
+                self._reply(codec.DUMP_DATA, index, pack7(chunk))
+            self._reply(codec.DUMP_END, len(chunks))
+        elif cmd == codec.WRITE:
+            self.writes += 1
+            if seq in self.drop:
+                self.drop.discard(seq)
+            elif seq in self.nak:
+                self.nak.discard(seq)
+                self._reply(codec.NAK, seq)
+            else:
+                self._staged[seq] = unpack7(payload)
+                self._reply(codec.ACK, seq)
+        elif cmd == codec.COMMIT:
+            if all(i in self._staged for i in range(seq)):
+                self.memory = b"".join(self._staged[i] for i in range(seq))
+                self._staged = {}
+                self._reply(codec.ACK, seq)
+            else:
+                self._reply(codec.NAK, seq)
+
+
+class VirtualMidiIn:
+    """python-rtmidi ``MidiIn`` look-alike bound to a :class:`VirtualBackend`."""
+
+    def __init__(self, backend: "VirtualBackend") -> None:
+        self._backend = backend
+        self._device: Optional[VirtualDevice] = None
+        self._callback = None
+        self._data = None
+        self._last = None
+        self._ignore_sysex = True  # rtmidi's default
+
+    def get_ports(self) -> List[str]:
+        return self._backend.input_names()
+
+    def open_port(self, index: int = 0) -> None:
+        device = self._backend.devices[self.get_ports()[index]]
+        device._attach(self)
+        self._device = device
+
+    def set_callback(self, callback, data=None) -> None:
+        self._callback, self._data = callback, data
+
+    def cancel_callback(self) -> None:
+        self._callback = None
+
+    def ignore_types(self, sysex: bool = True, timing: bool = True, active_sense: bool = True) -> None:
+        self._ignore_sysex = sysex
+
+    def close_port(self) -> None:
+        if self._device is not None:
+            self._device._detach(self)
+            self._device = None
+
+    def _deliver(self, data: List[int]) -> None:
+        callback = self._callback
+        if callback is None or (self._ignore_sysex and data[:1] == [0xF0]):
+            return
+        now = time.perf_counter()
+        delta = 0.0 if self._last is None else now - self._last
+        self._last = now
+        callback((data, delta), self._data)
+
+
+class VirtualMidiOut:
+    """python-rtmidi ``MidiOut`` look-alike bound to a :class:`VirtualBackend`."""
+
+    def __init__(self, backend: "VirtualBackend") -> None:
+        self._backend = backend
+        self._device: Optional[VirtualDevice] = None
+        self._generation = 0
+
+    def get_ports(self) -> List[str]:
+        return self._backend.output_names()
+
+    def open_port(self, index: int = 0) -> None:
+        device = self._backend.devices[self.get_ports()[index]]
+        self._device, self._generation = device, device.generation
+
+    def send_message(self, message) -> None:
+        if self._device is None:
+            raise OSError("port not open")
+        self._device._receive(bytes(message), self._generation)
+
+    def sysex_codec(self) -> LoopbackCodec:
+        """Virtual devices answer the loopback protocol (see :class:`SysexStandIn`)."""
+        return LoopbackCodec()
+
+    def close_port(self) -> None:
+        self._device = None
+
+
+class VirtualBackend:
+    """Registry of virtual devices, shaped like the python-rtmidi module.
+
+    Selected with ``MIDI_BACKEND=virtual``; :mod:`fighterdisplay.midi.device`
+    then lists and opens these ports instead of hardware. Starts with one
+    Midi Fighter Twister.
+    """
+
+    def __init__(self) -> None:
+        self.devices: Dict[str, VirtualDevice] = {}
+        self.reset()
+
+    def reset(self, **device_options) -> VirtualDevice:
+        """Drop every device and start over with a single Twister."""
+        self.devices = {}
+        return self.add_device(TWISTER, **device_options)
+
+    def add_device(self, name: str, **device_options) -> VirtualDevice:
+        device = VirtualDevice(name, **device_options)
+        self.devices[name] = device
+        return device
+
+    def device(self, name: str = TWISTER) -> VirtualDevice:
+        return self.devices[name]
+
+    def input_names(self) -> List[str]:
+        return [name for name, dev in self.devices.items() if dev.connected]
+
+    def output_names(self) -> List[str]:
+        return [name for name, dev in self.devices.items() if dev.connected]
+
+    def MidiIn(self) -> VirtualMidiIn:  # noqa: N802 - mirrors rtmidi.MidiIn
+        return VirtualMidiIn(self)
+
+    def MidiOut(self) -> VirtualMidiOut:  # noqa: N802 - mirrors rtmidi.MidiOut
+        return VirtualMidiOut(self)
+
+
+VIRTUAL = VirtualBackend()
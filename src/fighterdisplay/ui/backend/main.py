@@ -1,22 +1,37 @@
 from __future__ import annotations
 
 import asyncio
+import base64
 import contextlib
+import hashlib
+import json
+import threading
+import time
 from contextlib import asynccontextmanager
 from typing import Set
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Body, Query
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Body, Query, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 
 import os
+from fighterdisplay.ui.backend import IMPORT_STARTED
 from fighterdisplay.core.state import StateStore
-from fighterdisplay.core.presets import load_preset, apply_labels
+from fighterdisplay.core.changelog import ChangeLog
+from fighterdisplay.core.search import PresetIndex
+from fighterdisplay.core.cache import load_compiled
+from fighterdisplay.core.timing import PhaseTimer
+from fighterdisplay.core.payload import FragmentCache, assemble, dumps
+from fighterdisplay.core.subscriptions import Subscription
+from fighterdisplay.core.limits import Gate
+from fighterdisplay.core.shm import ValueExport
+from fighterdisplay.core.osc import OscFanout, parse_targets
+from fighterdisplay.core.scenes import CURVES, Morph, Scene, capture, scene_to_json
+from fighterdisplay.core.presets import apply_labels, safe_preset_name
 from fighterdisplay.core.config import (
-    load_config,
     save_config,
-    labels_from_config,
     cc_map_from_config,
     channels_from_config,
     invert_cc_map,
@@ -28,27 +43,83 @@ from fighterdisplay.midi.device import (
     find_twister_port,
     open_input,
     open_output,
-    send_cc,
+    open_input_raw,
+    open_output_raw,
+    send_cc_batch,
+    send_sysex,
+    sysex_codec,
 )
+from fighterdisplay.midi.scheduler import OutputScheduler
+from fighterdisplay.midi.sysex import SysexError, SysexTransfer
 
+# Startup phases (imports, config_load, port_probe, ready, first_client); see /api/startup
+startup = PhaseTimer(origin=IMPORT_STARTED)
+startup.end("imports")
 
 state = StateStore()
 connections: Set[WebSocket] = set()
+# Per-client bank filter and heartbeat rate, set via {"type": "subscribe"} messages
+subscriptions: dict[WebSocket, Subscription] = {}
 update_event = asyncio.Event()
-outbound_queue: asyncio.Queue[tuple[int, int, int]] = asyncio.Queue()
+# Futures of /api/state long-poll requests waiting for the next change
+_pollers: Set[asyncio.Future] = set()
+# At most one pending _wake_pollers call per loop, however fast changes arrive
+_wake_lock = threading.Lock()
+_wake_pending: asyncio.AbstractEventLoop | None = None
+wake_stats = {"scheduled": 0, "coalesced": 0}
+_midi_in = None
 _midi_out = None
+_midi_port_names: tuple[str | None, str | None] = (None, None)
+# Seconds between checks for the device being unplugged or plugged in; 0 disables
+MIDI_RESCAN = float(os.getenv("MIDI_RESCAN_S", "2"))
 LED_ECHO = os.getenv("LED_ECHO", "1") not in ("0", "false", "False", "no")
 HEARTBEAT_HZ = float(os.getenv("HEARTBEAT_HZ", "10"))  # reduce spam vs 60 Hz
+# Heartbeat rate for clients that report their page as hidden
+HIDDEN_HEARTBEAT_HZ = float(os.getenv("HIDDEN_HEARTBEAT_HZ", "0.2"))
+# Raw-byte rtmidi I/O (no mido Message objects); falls back to mido when unavailable
+MIDI_FAST_PATH = os.getenv("MIDI_FAST_PATH", "1") not in ("0", "false", "False", "no")
+# Paced device output: live echo first, bulk resync bursts with the leftover budget
+MIDI_OUT_RATE = float(os.getenv("MIDI_OUT_RATE", "2000"))  # messages per second
+MIDI_OUT_TICK = 0.002  # seconds between output scheduler runs while output is queued
+# Live-lane cap: under a flood the oldest echo messages are dropped (counted)
+MIDI_LIVE_QUEUE = int(os.getenv("MIDI_LIVE_QUEUE", "1024"))
+midi_output = OutputScheduler(rate=MIDI_OUT_RATE, max_live=MIDI_LIVE_QUEUE)
+# Everything that can grow with traffic is capped; see /api/stats for counters
+MAX_PENDING_BROADCASTS = int(os.getenv("MAX_PENDING_BROADCASTS", "8"))
+MAX_CLIENTS = int(os.getenv("MAX_CLIENTS", "64"))
+MAX_LONG_POLLS = int(os.getenv("MAX_LONG_POLLS", "64"))
+MAX_SCENES = int(os.getenv("MAX_SCENES", "256"))
+# Broadcasts spawned from MIDI threads; recreated per event loop (see lifespan)
+broadcast_gate = Gate(MAX_PENDING_BROADCASTS)
+client_gate = Gate(MAX_CLIENTS)
+# Optional memory-mapped export of live values for local tools (core/shm.py layout)
+SHM_EXPORT = os.getenv("SHM_EXPORT", "")
+value_export: ValueExport | None = None
+# Optional OSC-over-UDP output of encoder changes, e.g. OSC_TARGETS=127.0.0.1:9000
+OSC_TARGETS = os.getenv("OSC_TARGETS", "")
+OSC_PREFIX = os.getenv("OSC_PREFIX", "/ringside")
+OSC_FRAME = max(0.001, float(os.getenv("OSC_FRAME_MS", "5")) / 1000.0)  # bundling window
+osc_output: OscFanout | None = None
+poll_gate = Gate(MAX_LONG_POLLS)
+# Scene morph tick rate: state, clients and device are updated this often
+MORPH_HZ = float(os.getenv("MORPH_HZ", "50"))
+# Named encoder value snapshots (in memory) and the morph currently running
+scenes: dict[str, Scene] = {}
+_morph: Morph | None = None
+_morph_task: asyncio.Task | None = None
+# Device configuration dump/restore over SysEx: frames go through midi_output
+# (sharing its budget with CCs); chunks in flight before waiting for acknowledgements
+SYSEX_WINDOW = int(os.getenv("SYSEX_WINDOW", "4"))
+_sysex: SysexTransfer | None = None
+device_transfer: dict = {"state": "idle"}
+# Label/CC search over every preset in the config directory, refreshed by mtime
+preset_index = PresetIndex()
+# Recent state/mapping changes so reconnecting clients can resync from deltas
+changes = ChangeLog(int(os.getenv("CHANGE_LOG_SIZE", "1024")))
+
+
 def _safe_name(name: str) -> str | None:
-    import re
-    base = name.strip()
-    if not base:
-        return None
-    if not base.endswith(".json"):
-        base += ".json"
-    if not re.match(r"^[A-Za-z0-9._-]+\.json$", base):
-        return None
-    return base
+    return safe_preset_name(name)
 
 
 def _config_dir() -> str:
@@ -73,34 +144,201 @@ current_preset = "default.json"
 cc_map: dict[int, dict[int, int]] = {}
 channel_map: dict[int, dict[int, int]] = {}
 cc_reverse: dict[int, tuple[int, int]] = {}
+# Bumped whenever cc_map/channel_map are replaced (see _install_mapping)
+mapping_version = 0
+# Pre-encoded JSON blocks for state/mapping/channels, reused until they change
+payloads = FragmentCache()
 _main_loop: asyncio.AbstractEventLoop | None = None
 unsaved_changes: bool = False
+# 0-based MIDI channels the raw input accepts (mapped channels + bank select);
+# updated in place so an open port picks up mapping changes.
+midi_channels: set[int] = set()
 
 
-def _schedule(coro):
+def _refresh_midi_channels() -> None:
+    wanted = {ch - 1 for encs in channel_map.values() for ch in encs.values()}
+    wanted.add(state.bank_select[0])
+    midi_channels.intersection_update(wanted)
+    midi_channels.update(wanted)
+
+
+def _install_mapping(new_cc_map: dict, new_channel_map: dict, new_reverse: dict | None = None) -> None:
+    """Swap in a new CC/channel mapping and bump its version."""
+    global cc_map, channel_map, cc_reverse, mapping_version
+    cc_map = new_cc_map
+    channel_map = new_channel_map
+    cc_reverse = new_reverse if new_reverse is not None else invert_cc_map(new_cc_map)
+    mapping_version += 1
+    _refresh_midi_channels()
+
+
+def _message(kind: str | None = None, banks: frozenset[int] | None = None, **extra) -> str:
+    """Encode a full-state message: cached state/mapping/channels blocks + the dynamic part.
+
+    The state block is keyed by the store's mutation counter (labels live there
+    too), mapping and channels by ``mapping_version``. ``banks`` limits the
+    state block to those banks (one cached block per distinct bank set).
+    """
+    if banks is None:
+        state_block = payloads.get("state", state.version, state.dump)
+    else:
+        key = "state:" + ",".join(str(b) for b in sorted(banks))
+        state_block = payloads.get(key, state.version, lambda: state.dump(banks))
+    fragments = {
+        "state": state_block,
+        "mapping": payloads.get("mapping", mapping_version, lambda: cc_map),
+        "channels": payloads.get("channels", mapping_version, lambda: channel_map),
+    }
+    dynamic = {"type": kind} if kind else {}
+    dynamic["dirty"] = unsaved_changes
+    dynamic.update(extra)
+    return assemble(fragments, dynamic)
+
+
+def _wake_pollers() -> None:
+    global _wake_pending
+    with _wake_lock:
+        # Cleared first: a change recorded from here on schedules a new wake
+        _wake_pending = None
+    update_event.set()
+    for fut in list(_pollers):
+        if not fut.done():
+            fut.set_result(None)
+    _pollers.clear()
+
+
+def _notify_update() -> None:
+    # MIDI callbacks run on backend threads, so go through the main loop;
+    # while a wake is already queued there, it will see this change too
+    global _wake_pending
+    loop = _main_loop
+    if loop is None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+    with _wake_lock:
+        if _wake_pending is loop:
+            wake_stats["coalesced"] += 1
+            return
+        _wake_pending = loop
+        wake_stats["scheduled"] += 1
+    try:
+        loop.call_soon_threadsafe(_wake_pollers)
+    except RuntimeError:
+        # Loop already closed
+        with _wake_lock:
+            if _wake_pending is loop:
+                _wake_pending = None
+
+
+def _publish(change: dict | None, version: int) -> None:
+    """Mirror a change into the shared-memory export (a full rewrite when ``change`` is None) and OSC."""
+    osc = osc_output
+    if osc is not None and change is not None:
+        if change.get("type") == "encoder" and "value" in change:
+            osc.push(change["bank"], change["encoder"], change["value"])
+        elif change.get("type") == "values":
+            osc.push_many(change["values"])
+        elif change.get("type") == "bank":
+            osc.push_bank(change["bank"])
+    export = value_export
+    if export is None:
+        return
     try:
-        if _main_loop is not None:
-            asyncio.run_coroutine_threadsafe(coro, _main_loop)
+        if change is None:
+            export.write_all(state.dump(), version)
+        elif change.get("type") == "encoder":
+            export.write([(change["bank"], change["encoder"], change["value"])], version=version)
+        elif change.get("type") == "values":
+            export.write(change["values"], version=version)
+        elif change.get("type") == "bank":
+            export.write(current_bank=change["bank"], version=version)
+        else:
+            export.write(version=version)
     except Exception:
         pass
 
 
-async def broadcast(payload: dict):
-    if not connections:
+def _record(change: dict) -> int:
+    """Append to the change log and wake anything waiting for a new version."""
+    version = changes.append(change)
+    _publish(change, version)
+    _notify_update()
+    return version
+
+
+def _reset_changes() -> int:
+    version = changes.reset()
+    _publish(None, version)
+    _notify_update()
+    return version
+
+
+def _schedule(coro):
+    """Run ``coro`` on the main loop from any thread, at most MAX_PENDING_BROADCASTS at once.
+
+    Over the cap the coroutine is dropped and counted: the next broadcast or
+    heartbeat carries the same state, so a flood cannot pile up tasks.
+    """
+    loop, gate = _main_loop, broadcast_gate
+    if loop is None or not gate.try_enter():
+        coro.close()
+        return
+    try:
+        fut = asyncio.run_coroutine_threadsafe(coro, loop)
+    except Exception:
+        coro.close()
+        gate.leave()
         return
-    living = set()
+    fut.add_done_callback(lambda _fut: gate.leave())
+
+
+async def _fan_out(text_for) -> None:
+    """Send ``text_for(ws)`` to every client (None skips it), dropping broken connections."""
+    dead = set()
     for ws in list(connections):
         try:
-            await ws.send_json(payload)
-            living.add(ws)
+            text = text_for(ws)
+            if text is not None:
+                await ws.send_text(text)
         except asyncio.CancelledError:
             # Propagate cancellation so shutdown succeeds
             raise
         except Exception:
             # Drop broken connection
-            pass
-    connections.clear()
-    connections.update(living)
+            dead.add(ws)
+            subscriptions.pop(ws, None)
+    # Only remove what failed: clients may have connected during the awaits
+    connections.difference_update(dead)
+
+
+async def broadcast_state(kind: str, periodic: bool = False, **extra):
+    """Send a full-state message, filtered to each client's subscribed banks.
+
+    Clients sharing a bank filter share one encoding. ``periodic`` messages
+    (heartbeats) are additionally rate-limited per client by visibility/max_fps.
+    """
+    if not connections:
+        return
+    now = time.monotonic()
+    current = state.current_bank
+    encoded: dict[frozenset[int] | None, str] = {}
+
+    def text_for(ws):
+        sub = subscriptions.get(ws)
+        if sub is None:
+            banks = None
+        else:
+            if periodic and not sub.heartbeat_due(now, HEARTBEAT_HZ, HIDDEN_HEARTBEAT_HZ):
+                return None
+            banks = sub.banks_for(current)
+        text = encoded.get(banks)
+        if text is None:
+            text = encoded[banks] = _message(kind, banks=banks, **extra)
+        return text
+
+    await _fan_out(text_for)
 
 
 def process_midi_msg(msg: dict) -> None:
@@ -116,14 +354,26 @@ def process_midi_msg(msg: dict) -> None:
         channel = 0
     if control is None or value is None:
         return
-    # Bank select message: channel 4 (0-based channel == 3), CC 0..3 with value 127
-    try:
-        if int(channel) == 3 and int(value) == 127 and int(control) in (0, 1, 2, 3):
-            new_bank = int(control) + 1  # 0..3 -> bank 1..4
-            snap = state.set_bank(new_bank)
-            _schedule(broadcast({"type": "bank", "state": snap.model_dump(), "mapping": cc_map, "channels": channel_map, "dirty": unsaved_changes}))
-            loop = asyncio.get_event_loop()
-            loop.call_soon_threadsafe(update_event.set)
+    try:
+        control, value = int(control), int(value)
+    except Exception:
+        return
+    process_cc((channel, control, value))
+
+
+def process_cc(cc: tuple[int, int, int]) -> None:
+    """Process a (channel 0..15, control, value) CC tuple; the raw MIDI fast path."""
+    channel, control, value = cc
+    # Bank select message: value 127 on the layout's bank-select channel
+    # (Twister: channel 4, CC 0..3 -> bank 1..4)
+    try:
+        select_channel, first, banks = state.bank_select
+        if int(channel) == select_channel and int(value) == 127 and first <= int(control) < first + banks:
+            new_bank = int(control) - first + 1
+            state.set_bank(new_bank)
+            version = _record({"type": "bank", "bank": new_bank})
+            _schedule(broadcast_state("bank", version=version))
+            request_resync("bank")
             return
     except Exception:
         pass
@@ -144,97 +394,343 @@ def process_midi_msg(msg: dict) -> None:
     # Only switch displayed bank if we matched a mapping or bank-select, not from raw channel
     if bank_from_mapping:
         try:
-            current_bank = state.snapshot().current_bank
-            if int(bank) != int(current_bank):
-                snap = state.set_bank(int(bank))
-                _schedule(broadcast({"type": "bank", "state": snap.model_dump(), "mapping": cc_map, "channels": channel_map, "dirty": unsaved_changes}))
+            if int(bank) != state.current_bank:
+                state.set_bank(int(bank))
+                version = _record({"type": "bank", "bank": int(bank)})
+                _schedule(broadcast_state("bank", version=version))
+                request_resync("bank")
         except Exception:
             pass
-    state.update_encoder(bank, enc_index, int(value))
+    stored = state.set_value(bank, enc_index, int(value))
+    _record({"type": "encoder", "bank": bank, "encoder": enc_index, "value": stored})
+    # The device already shows what it just sent us
+    midi_output.mark_shown(channel, int(control), int(value))
     if LED_ECHO:
-        try:
-            outbound_queue.put_nowait((int(control), int(value), channel))
-        except Exception:
-            pass
-    # Notify async loop
-    loop = asyncio.get_event_loop()
-    loop.call_soon_threadsafe(update_event.set)
+        midi_output.push_live(channel, int(control), int(value))
 
 
 def _midi_callback(msg: dict):
+    if msg.get("type") == "sysex":
+        _on_sysex(msg.get("data", b""))
+        return
     process_midi_msg(msg)
 
 
-async def _midi_watcher():
-    # Try opening Twister input/output if available; otherwise idle.
-    global _midi_out
-    inp = None
+def _on_sysex(frame: bytes) -> None:
+    # Device replies only matter while a transfer is waiting for them
+    transfer = _sysex
+    if transfer is not None:
+        transfer.feed(frame)
+
+
+def _resync_messages(scope: str = "bank") -> list[tuple[int, int, int]]:
+    """(channel, control, value) for every mapped encoder in the current bank or all banks."""
+    snap = state.snapshot()
+    banks = [snap.current_bank] if scope == "bank" else list(cc_map)
+    messages = []
+    for bank in banks:
+        bank_state = snap.banks.get(bank)
+        for enc, cc in cc_map.get(bank, {}).items():
+            enc_state = bank_state.encoders.get(enc) if bank_state else None
+            channel = channel_map.get(bank, {}).get(enc, 1) - 1
+            messages.append((channel, int(cc), enc_state.value if enc_state else 0))
+    return messages
+
+
+def request_resync(scope: str = "bank") -> int:
+    """Queue a paced push of encoder values to the device's LED rings.
+
+    ``scope`` is "bank" (current bank) or "device" (every mapped encoder). Values
+    the device is known to show already are skipped; returns how many were queued.
+    """
+    return midi_output.push_bulk(_resync_messages(scope))
+
+
+def _apply_values(updates: list[tuple[int, int, int]]) -> int:
+    """Apply a batch of encoder values to state, the change log and the device queue."""
+    state.set_values(updates)
+    # One log entry per batch so a morph cannot flush the log within a second
+    version = _record({"type": "values", "values": [list(u) for u in updates]})
+    messages = []
+    for bank, enc, value in updates:
+        cc = cc_map.get(bank, {}).get(enc)
+        if cc is not None:
+            messages.append((channel_map.get(bank, {}).get(enc, 1) - 1, int(cc), value))
+    if messages:
+        # Bulk lane: a value superseded before it went out is simply replaced
+        midi_output.push_bulk(messages)
+    return version
+
+
+async def broadcast_values(updates: list[tuple[int, int, int]], version: int, kind: str = "morph"):
+    """Send encoder deltas (same shape as a resync) to clients subscribed to their banks.
+
+    Deltas go out at MORPH_HZ, so hidden clients and those whose max_fps is
+    lower are skipped; their throttled heartbeat carries the full state.
+    """
+    if not connections:
+        return
+    items = [{"type": "encoder", "bank": b, "encoder": e, "value": v} for b, e, v in updates]
+    current = state.current_bank
+    encoded: dict[frozenset[int] | None, str | None] = {}
+
+    def text_for(ws):
+        sub = subscriptions.get(ws)
+        if sub is not None and not sub.keeps_up_with(MORPH_HZ):
+            return None
+        banks = None if sub is None else sub.banks_for(current)
+        if banks not in encoded:
+            wanted = items if banks is None else [c for c in items if c["bank"] in banks]
+            encoded[banks] = (
+                dumps({"type": kind, "changes": wanted, "version": version, "dirty": unsaved_changes}) if wanted else None
+            )
+        return encoded[banks]
+
+    await _fan_out(text_for)
+
+
+async def _run_morph(morph: Morph):
+    """Step ``morph`` at MORPH_HZ on a fixed schedule until it completes."""
+    global _morph
+    interval = 1.0 / max(1.0, MORPH_HZ)
+    deadline = time.monotonic()
+    try:
+        while True:
+            updates = morph.step()
+            if updates:
+                version = _apply_values(updates)
+                await broadcast_values(updates, version)
+            if morph.done:
+                break
+            deadline += interval
+            await asyncio.sleep(max(0.0, deadline - time.monotonic()))
+    finally:
+        if _morph is morph:
+            _morph = None
+
+
+def _stop_morph() -> None:
+    global _morph, _morph_task
+    if _morph_task is not None and not _morph_task.done():
+        _morph_task.cancel()
+    _morph = None
+    _morph_task = None
+
+
+def _waker(event: asyncio.Event):
+    """Callback that sets ``event`` on the running loop from any thread."""
+    loop = asyncio.get_running_loop()
+
+    def wake() -> None:
+        try:
+            loop.call_soon_threadsafe(event.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    return wake
+
+
+async def _osc_pump(osc: OscFanout):
+    # One bundle per destination per frame, whatever arrived in between;
+    # idle until the first change of a frame arrives
+    ready = asyncio.Event()
+    osc.on_ready = _waker(ready)
+    try:
+        while True:
+            await ready.wait()
+            ready.clear()
+            await asyncio.sleep(OSC_FRAME)
+            osc.flush()
+    finally:
+        osc.on_ready = None
+
+
+def _send_output(out, batch) -> None:
+    """Write a scheduler batch in order: runs of CCs in one write, SysEx frames singly."""
+    run = []
+    for item in batch:
+        if isinstance(item, bytes):
+            if run:
+                send_cc_batch(out, run)
+                run = []
+            send_sysex(out, item)
+        else:
+            run.append(item)
+    if run:
+        send_cc_batch(out, run)
+
+
+async def _midi_output_pump():
+    # Send whatever the scheduler's budget allows every tick while anything is
+    # queued; sleep until the scheduler reports new output otherwise
+    ready = asyncio.Event()
+    midi_output.on_ready = _waker(ready)
+    try:
+        while True:
+            ready.clear()
+            if not midi_output.pending():
+                if _midi_out is None:
+                    # Nothing to show values on; don't let the device model go stale
+                    midi_output.forget()
+                await ready.wait()
+                continue
+            batch = midi_output.take()
+            if batch and _midi_out is not None:
+                _send_output(_midi_out, batch)
+            elif _midi_out is None:
+                midi_output.forget()
+            await asyncio.sleep(MIDI_OUT_TICK)
+    finally:
+        midi_output.on_ready = None
+
+
+def _open_midi_ports(in_name: str | None, out_name: str | None):
+    """Open the device ports, preferring raw rtmidi I/O when enabled."""
+    inp = out = None
+    if MIDI_FAST_PATH:
+        if in_name:
+            _refresh_midi_channels()
+            inp = open_input_raw(in_name, process_cc, channels=midi_channels, sysex=_on_sysex)
+        if out_name:
+            out = open_output_raw(out_name)
+    if in_name and inp is None:
+        inp = open_input(in_name, _midi_callback)
+    if out_name and out is None:
+        out = open_output(out_name)
+    return inp, out
+
+
+def _close_port(port) -> None:
+    try:
+        port.close()
+    except Exception:
+        pass
+
+
+def _rescan_ports() -> bool:
+    """Drop ports whose device vanished and open a Twister that (re)appeared.
+
+    Runs in a worker thread. Returns True when an output port was (re)opened,
+    so the caller can resync the LED rings.
+    """
+    global _midi_in, _midi_out, _midi_port_names
     in_ports = list_input_ports()
     out_ports = list_output_ports()
-    in_name = find_twister_port(in_ports) if in_ports else None
-    out_name = find_twister_port(out_ports) if out_ports else None
-    if in_name:
-        inp = open_input(in_name, _midi_callback)
-    if out_name:
-        _midi_out = open_output(out_name)
-    # Periodically emit heartbeats so UI can stay responsive.
+    in_name, out_name = _midi_port_names
+    if _midi_in is not None and in_name not in in_ports:
+        _close_port(_midi_in)
+        _midi_in, in_name = None, None
+    if _midi_out is not None and out_name not in out_ports:
+        _close_port(_midi_out)
+        _midi_out, out_name = None, None
+    want_in = find_twister_port(in_ports) if _midi_in is None and in_ports else None
+    want_out = find_twister_port(out_ports) if _midi_out is None and out_ports else None
+    opened = False
+    if want_in or want_out:
+        inp, out = _open_midi_ports(want_in, want_out)
+        if inp is not None:
+            _midi_in, in_name = inp, want_in
+        if out is not None:
+            _midi_out, out_name = out, want_out
+            opened = True
+    _midi_port_names = (in_name, out_name)
+    return opened
+
+
+def _probe_and_open_ports() -> bool:
+    # Importing mido/rtmidi and enumerating ports can take a while on small
+    # hosts, so this runs in a worker thread while the server already serves.
+    with startup.phase("port_probe"):
+        return _rescan_ports()
+
+
+async def _midi_watcher():
+    # Open the Twister when present, follow it being unplugged/replugged and
+    # emit heartbeats so the UI stays responsive.
+    global _midi_in, _midi_out, _midi_port_names
+    loop = asyncio.get_running_loop()
+    opened = await asyncio.to_thread(_probe_and_open_ports)
+    next_scan = loop.time() + MIDI_RESCAN
     try:
         while True:
-            # Drain outbound MIDI messages
-            try:
-                control, value, channel = outbound_queue.get_nowait()
-                if _midi_out is not None:
-                    send_cc(_midi_out, control, value, channel)
-            except asyncio.QueueEmpty:
-                pass
+            if opened:
+                # Freshly opened device: bring every LED ring in line with the server
+                midi_output.forget()
+                request_resync("device")
+                opened = False
             await asyncio.sleep(max(0.05, 1.0 / HEARTBEAT_HZ))
-            await broadcast({"type": "heartbeat", "state": state.snapshot().model_dump(), "mapping": cc_map, "channels": channel_map, "dirty": unsaved_changes})
+            # Read the version before the snapshot so clients never skip a change
+            version = changes.version
+            await broadcast_state("heartbeat", periodic=True, version=version)
+            if MIDI_RESCAN > 0 and loop.time() >= next_scan:
+                opened = await asyncio.to_thread(_rescan_ports)
+                next_scan = loop.time() + MIDI_RESCAN
     finally:
-        if inp is not None:
-            try:
-                inp.close()
-            except Exception:
-                pass
-        if _midi_out is not None:
-            try:
-                _midi_out.close()
-            except Exception:
-                pass
+        for port in (_midi_in, _midi_out):
+            if port is not None:
+                _close_port(port)
+        _midi_in = _midi_out = None
+        _midi_port_names = (None, None)
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Load unified config (labels + CC mapping)
-    global app_config, cc_map, channel_map, cc_reverse, current_preset, _main_loop, unsaved_changes
+    global app_config, current_preset, _main_loop, unsaved_changes, broadcast_gate, value_export, osc_output
     try:
         _main_loop = asyncio.get_running_loop()
+        # Spawns pending on a previous (stopped) loop never finish; start clean
+        broadcast_gate = Gate(MAX_PENDING_BROADCASTS)
         # Resolve initial preset from env
         cfg_path_env = os.getenv("CONFIG_PATH", "assets/presets/default.json")
         try:
             current_preset = os.path.basename(cfg_path_env)
         except Exception:
             current_preset = "default.json"
-        app_config = load_config(_config_path())
-        labels = labels_from_config(app_config)
-        if labels:
-            apply_labels(state, labels)
-        cc_map = cc_map_from_config(app_config)
-        channel_map = channels_from_config(app_config)
-        cc_reverse = invert_cc_map(cc_map)
-        unsaved_changes = False
+        with startup.phase("config_load"):
+            # Parsed + compiled preset comes from the on-disk cache when unchanged
+            compiled = load_compiled(_config_path())
+            app_config = compiled["config"]
+            state.set_layout(**compiled["layout"])
+            labels = compiled["labels"]
+            if labels:
+                apply_labels(state, labels)
+            _install_mapping(compiled["cc_map"], compiled["channels"], compiled["cc_reverse"])
+            unsaved_changes = False
     except Exception:
         app_config = {"banks": {}}
-        cc_map, channel_map, cc_reverse = {}, {}, {}
+        _install_mapping({}, {}, {})
         unsaved_changes = False
-    task = asyncio.create_task(_midi_watcher())
+    if SHM_EXPORT and value_export is None:
+        try:
+            value_export = ValueExport(SHM_EXPORT, epoch=int(changes.epoch, 16))
+        except Exception:
+            value_export = None
+    if OSC_TARGETS and osc_output is None:
+        osc_output = OscFanout(parse_targets(OSC_TARGETS), prefix=OSC_PREFIX)
+    _reset_changes()
+    tasks = [asyncio.create_task(_midi_watcher()), asyncio.create_task(_midi_output_pump())]
+    if osc_output is not None:
+        tasks.append(asyncio.create_task(_osc_pump(osc_output)))
+    startup.mark("ready")
     try:
         yield
     finally:
-        task.cancel()
+        _stop_morph()
+        if value_export is not None:
+            value_export.close()
+            value_export = None
+        for task in tasks:
+            task.cancel()
         # On Python 3.11+, asyncio.CancelledError derives from BaseException.
         # Suppress it here to allow clean shutdown without ERROR logs.
-        with contextlib.suppress(asyncio.CancelledError):
-            await task
+        for task in tasks:
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        if osc_output is not None:
+            osc_output.flush()
+            osc_output.close()
+            osc_output = None
 
 
 app = FastAPI(lifespan=lifespan)
@@ -249,28 +745,110 @@ app.add_middleware(
 # Static UI will be mounted after API routes to avoid route shadowing
 
 
+@app.get("/api/startup")
+def api_startup():
+    """Startup phase timings in seconds since the backend module started importing."""
+    return {"phases": startup.as_dict()}
+
+
+@app.get("/api/stats")
+async def api_stats():
+    """Queue depths, caps and overflow counters for long-running sessions."""
+    return {
+        "tasks": len(asyncio.all_tasks()),
+        "clients": client_gate.stats(),
+        "broadcasts": broadcast_gate.stats(),
+        "long_polls": poll_gate.stats(),
+        "wakeups": dict(wake_stats),
+        "midi_output": midi_output.stats(),
+        "scenes": {"count": len(scenes), "limit": MAX_SCENES},
+        "osc": osc_output.stats() if osc_output is not None else None,
+    }
+
+
 @app.get("/api/ports")
 def api_ports():
     return {"inputs": list_input_ports(), "outputs": list_output_ports()}
 
 
+def _etag(*parts) -> str:
+    """Strong ETag from the versions a response body is derived from."""
+    key = "|".join(str(p) for p in (changes.epoch, *parts))
+    return '"' + hashlib.blake2s(key.encode(), digest_size=8).hexdigest() + '"'
+
+
+def _conditional(request: Request, etag: str, build) -> Response:
+    """304 when the client's If-None-Match has ``etag``, else the JSON ``build()`` returns."""
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    match = request.headers.get("if-none-match")
+    if match:
+        tags = {t.strip() for t in match.split(",")}
+        if "*" in tags or etag in tags or f"W/{etag}" in tags:
+            return Response(status_code=304, headers=headers)
+    return Response(build(), media_type="application/json", headers=headers)
+
+
+async def _wait_for_change(since: int, timeout: float, epoch: str | None = None) -> None:
+    """Return once the change-log version exceeds ``since`` or ``timeout`` elapses.
+
+    A ``since`` from the future or another ``epoch`` means the server restarted
+    under the client, which must resync now rather than after the timeout.
+    """
+    if changes.version != since or (epoch is not None and epoch != changes.epoch):
+        return
+    if not poll_gate.try_enter():
+        # Over the cap the request is answered right away instead of parked
+        return
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    try:
+        while changes.version <= since:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                return
+            fut = loop.create_future()
+            _pollers.add(fut)
+            try:
+                await asyncio.wait_for(fut, remaining)
+            except asyncio.TimeoutError:
+                return
+            finally:
+                _pollers.discard(fut)
+    finally:
+        poll_gate.leave()
+
+
 @app.get("/api/state")
-def api_state():
-    return {"state": state.snapshot().model_dump(), "mapping": cc_map, "channels": channel_map, "preset": os.path.basename(_config_path()), "dirty": unsaved_changes}
+async def api_state(
+    request: Request,
+    wait: int | None = Query(None, description="long-poll: return once version > wait"),
+    timeout: float = Query(25.0, ge=0, le=60),
+    epoch: str | None = Query(None, description="long-poll: epoch the wait version belongs to"),
+):
+    if wait is not None:
+        await _wait_for_change(wait, timeout, epoch)
+    # Versions are read before the body is built, so a tag is never newer than its body
+    preset = os.path.basename(_config_path())
+    version = changes.version
+    etag = _etag("state", version, state.version, mapping_version, unsaved_changes, preset)
+    return _conditional(request, etag, lambda: _message(preset=preset, version=version, epoch=changes.epoch))
 
 
 @app.post("/api/bank")
 async def api_set_bank(payload: dict = Body(...)):
-    bank = int(payload.get("bank", 1))
-    snap = state.set_bank(bank)
+    layout = state.layout()
+    bank = max(1, min(layout.banks, int(payload.get("bank", 1))))
+    state.set_bank(bank)
+    version = _record({"type": "bank", "bank": bank})
     # Also emit a bank-select MIDI message to the connected device so the host
-    # hardware follows UI bank changes (channel 4, control bank-1, value 127)
+    # hardware follows UI bank changes (Twister: channel 4, control bank-1, value 127)
     try:
-        control = max(0, min(3, int(bank) - 1))
-        outbound_queue.put_nowait((control, 127, 3))
+        # layout_from_config guarantees every bank has its own CC <= 127
+        midi_output.push_live(layout.bank_select_channel - 1, layout.bank_select_cc + bank - 1, 127)
     except Exception:
         pass
-    await broadcast({"type": "bank", "state": snap.model_dump(), "mapping": cc_map, "channels": channel_map, "dirty": unsaved_changes})
+    request_resync("bank")
+    await broadcast_state("bank", version=version)
     return {"ok": True}
 
 
@@ -284,14 +862,190 @@ async def api_midi(payload: dict = Body(...)):
     return {"ok": True}
 
 
+@app.post("/api/resync")
+def api_resync(payload: dict = Body(default={})):
+    """Push encoder values to the device: {"scope": "bank"} (default) or "device"."""
+    scope = "device" if str(payload.get("scope", "bank")) == "device" else "bank"
+    return {"ok": True, "scope": scope, "queued": request_resync(scope)}
+
+
+async def _device_transfer(kind: str, data: bytes = b"") -> dict:
+    """Run a SysEx dump or restore in a worker thread; progress goes to ``device_transfer``."""
+    global _sysex
+    if _midi_out is None:
+        return {"ok": False, "error": "no device"}
+    if _sysex is not None:
+        return {"ok": False, "error": "transfer in progress"}
+    codec = sysex_codec(_midi_out)
+    if codec is None:
+        # No codec for this device's command set: don't send it foreign SysEx
+        return {"ok": False, "error": "unsupported device"}
+
+    def progress(done: int, total: int) -> None:
+        device_transfer.update(done=done, total=total)
+
+    # The output pump is the port's only writer, so SysEx and CCs never race
+    transfer = SysexTransfer(midi_output.push_sysex, codec, window=SYSEX_WINDOW, progress=progress)
+    device_transfer.clear()
+    device_transfer.update(state=kind, done=0, total=0)
+    _sysex = transfer
+    started = time.monotonic()
+    try:
+        if kind == "dump":
+            data = await asyncio.to_thread(transfer.dump)
+        else:
+            await asyncio.to_thread(transfer.restore, data)
+        device_transfer["state"] = "done"
+        return {"ok": True, "bytes": len(data), "data": data}
+    except SysexError as exc:
+        device_transfer.update(state="error", error=str(exc))
+        return {"ok": False, "error": str(exc)}
+    finally:
+        _sysex = None
+        device_transfer.update(
+            retransmits=transfer.retransmits,
+            bytes_sent=transfer.bytes_sent,
+            elapsed=round(time.monotonic() - started, 3),
+        )
+
+
+@app.get("/api/device/transfer")
+def api_device_transfer():
+    """Progress of the running (or last) device dump/restore."""
+    return dict(device_transfer)
+
+
+@app.post("/api/device/dump")
+async def api_device_dump():
+    """Read the device's own configuration and keep it in the preset (unsaved)."""
+    global app_config, unsaved_changes
+    result = await _device_transfer("dump")
+    data = result.pop("data", b"")
+    if result["ok"]:
+        app_config = dict(app_config)
+        app_config["device"] = {"sysex": base64.b64encode(data).decode("ascii"), "bytes": len(data)}
+        unsaved_changes = True
+        result["dirty"] = True
+    return result
+
+
+@app.post("/api/device/restore")
+async def api_device_restore(payload: dict = Body(default={})):
+    """Write device configuration: base64 ``data`` or the preset's stored settings."""
+    encoded = payload.get("data")
+    if encoded is None:
+        encoded = (app_config.get("device") or {}).get("sysex")
+    if not encoded:
+        return {"ok": False, "error": "no device settings in preset"}
+    try:
+        data = base64.b64decode(str(encoded), validate=True)
+    except ValueError:
+        return {"ok": False, "error": "invalid data"}
+    result = await _device_transfer("restore", data)
+    result.pop("data", None)
+    if result["ok"]:
+        # A reconfigured device may have reset its rings
+        midi_output.forget()
+        request_resync("device")
+    return result
+
+
+@app.get("/api/scenes")
+def api_list_scenes():
+    morph = _morph
+    return {
+        "scenes": sorted(scenes),
+        "curves": list(CURVES),
+        "morph": morph.describe() if morph is not None and not morph.done else None,
+    }
+
+
+@app.post("/api/scenes")
+def api_capture_scene(payload: dict = Body(...)):
+    """Store the current encoder values as a named scene (optionally only some ``banks``)."""
+    name = str(payload.get("name", "")).strip()
+    if not name:
+        return {"ok": False, "error": "invalid name"}
+    banks = payload.get("banks")
+    try:
+        scene = capture(state, [int(b) for b in banks] if banks is not None else None)
+    except Exception:
+        return {"ok": False, "error": "invalid banks"}
+    if name not in scenes and len(scenes) >= MAX_SCENES:
+        return {"ok": False, "error": "too many scenes"}
+    scenes[name] = scene
+    return {"ok": True, "name": name, "encoders": len(scene)}
+
+
+@app.get("/api/scenes/{name}")
+def api_get_scene(name: str):
+    scene = scenes.get(name)
+    if scene is None:
+        return JSONResponse({"ok": False, "error": "not found"}, status_code=404)
+    return {"ok": True, "name": name, "values": scene_to_json(scene)}
+
+
+@app.delete("/api/scenes/{name}")
+def api_delete_scene(name: str):
+    if scenes.pop(name, None) is None:
+        return {"ok": False, "error": "not found"}
+    return {"ok": True}
+
+
+@app.post("/api/scenes/morph")
+async def api_morph(payload: dict = Body(...)):
+    """Morph to scene ``to`` over ``duration`` seconds along ``curve``.
+
+    Starts from scene ``from`` when given, else from the current values; a
+    running morph is replaced.
+    """
+    global _morph, _morph_task
+    target = scenes.get(str(payload.get("to", "")))
+    if target is None:
+        return {"ok": False, "error": "unknown target scene"}
+    current = capture(state)
+    start = current
+    if payload.get("from") is not None:
+        start = scenes.get(str(payload.get("from")))
+        if start is None:
+            return {"ok": False, "error": "unknown start scene"}
+    try:
+        duration = max(0.0, min(3600.0, float(payload.get("duration", 1.0))))
+        morph = Morph(start, target, duration, str(payload.get("curve", "linear")), shown=current)
+    except (TypeError, ValueError) as exc:
+        return {"ok": False, "error": str(exc)}
+    _stop_morph()
+    _morph = morph
+    _morph_task = asyncio.create_task(_run_morph(morph))
+    return {"ok": True, "morph": morph.describe()}
+
+
+@app.post("/api/scenes/morph/stop")
+def api_stop_morph():
+    running = _morph is not None
+    _stop_morph()
+    return {"ok": True, "stopped": running}
+
+
 @app.get("/api/mapping")
-def api_get_mapping():
-    return {"mapping": cc_map, "channels": channel_map}
+def api_get_mapping(request: Request):
+    etag = _etag("mapping", mapping_version)
+    return _conditional(
+        request,
+        etag,
+        lambda: assemble(
+            {
+                "mapping": payloads.get("mapping", mapping_version, lambda: cc_map),
+                "channels": payloads.get("channels", mapping_version, lambda: channel_map),
+            },
+            {},
+        ),
+    )
 
 
 @app.post("/api/mapping")
 async def api_set_mapping(payload: dict = Body(...)):
-    global app_config, cc_map, channel_map, cc_reverse, unsaved_changes
+    global app_config, unsaved_changes
     try:
         bank = int(payload.get("bank"))
         encoder = int(payload.get("encoder"))
@@ -324,9 +1078,8 @@ async def api_set_mapping(payload: dict = Body(...)):
         ch_int = channel_map.get(bank, {}).get(encoder, 1)
     # Update unified config (cc and optional label)
     app_config = set_encoder_cc(dict(app_config), bank, encoder, cc_int, label=label if label is not None else None, channel=ch_int)
-    cc_map = cc_map_from_config(app_config)
-    channel_map = channels_from_config(app_config)
-    cc_reverse = invert_cc_map(cc_map)
+    _install_mapping(cc_map_from_config(app_config), channels_from_config(app_config))
+    _record({"type": "mapping", "mapping": cc_map, "channels": channel_map})
     save_config(_config_path(), app_config)
     unsaved_changes = False
     # If label changed, update runtime state label immediately
@@ -338,7 +1091,8 @@ async def api_set_mapping(payload: dict = Body(...)):
         except Exception:
             pass
         state.update_encoder(bank, encoder, current_val, label=str(label))
-    await broadcast({"type": "mapping", "mapping": cc_map, "channels": channel_map, "state": state.snapshot().model_dump(), "dirty": unsaved_changes})
+        _record({"type": "encoder", "bank": bank, "encoder": encoder, "value": current_val, "label": str(label)})
+    await broadcast_state("mapping", version=changes.version)
     return {"ok": True, "mapping": cc_map, "channels": channel_map}
 
 
@@ -348,7 +1102,7 @@ async def api_set_mapping_temp(payload: dict = Body(...)):
 
     Useful for staging edits until the user chooses Save/Save As.
     """
-    global app_config, cc_map, channel_map, cc_reverse, unsaved_changes
+    global app_config, unsaved_changes
     try:
         bank = int(payload.get("bank"))
         encoder = int(payload.get("encoder"))
@@ -380,9 +1134,8 @@ async def api_set_mapping_temp(payload: dict = Body(...)):
         ch_int = channel_map.get(bank, {}).get(encoder, 1)
     # Update in-memory config only
     app_config = set_encoder_cc(dict(app_config), bank, encoder, cc_int, label=label if label is not None else None, channel=ch_int)
-    cc_map = cc_map_from_config(app_config)
-    channel_map = channels_from_config(app_config)
-    cc_reverse = invert_cc_map(cc_map)
+    _install_mapping(cc_map_from_config(app_config), channels_from_config(app_config))
+    _record({"type": "mapping", "mapping": cc_map, "channels": channel_map})
     # Update runtime label if provided
     if label is not None:
         snap = state.snapshot()
@@ -392,24 +1145,40 @@ async def api_set_mapping_temp(payload: dict = Body(...)):
         except Exception:
             pass
         state.update_encoder(bank, encoder, current_val, label=str(label))
+        _record({"type": "encoder", "bank": bank, "encoder": encoder, "value": current_val, "label": str(label)})
     unsaved_changes = True
-    await broadcast({"type": "mapping", "mapping": cc_map, "channels": channel_map, "state": state.snapshot().model_dump(), "dirty": unsaved_changes})
+    await broadcast_state("mapping", version=changes.version)
     return {"ok": True, "mapping": cc_map, "channels": channel_map}
 
 
 @app.get("/api/presets")
-def api_list_presets():
-    try:
-        files = [f for f in os.listdir(_config_dir()) if f.endswith('.json')]
-        files.sort()
-    except Exception:
-        files = []
-    return {"presets": files, "current": os.path.basename(_config_path())}
+def api_list_presets(request: Request):
+    # The search index tracks the directory by mtime, so its version doubles
+    # as the catalog version
+    directory = _config_dir()
+    preset_index.refresh(directory)
+    current = os.path.basename(_config_path())
+    etag = _etag("presets", directory, preset_index.version, current)
+    return _conditional(request, etag, lambda: dumps({"presets": preset_index.names(), "current": current}))
+
+
+@app.get("/api/presets/search")
+def api_search_presets(
+    q: str | None = Query(None),
+    cc: int | None = Query(None, ge=0, le=127),
+    channel: int | None = Query(None, ge=1, le=16),
+    limit: int = Query(50, ge=1, le=1000),
+):
+    """Find presets by label text (``q``) and/or mapped ``cc``/``channel``."""
+    if q is None and cc is None and channel is None:
+        return JSONResponse({"ok": False, "error": "no query"}, status_code=400)
+    preset_index.refresh(_config_dir())
+    return {"ok": True, "results": preset_index.search(label=q, cc=cc, channel=channel, limit=limit)}
 
 
 @app.post("/api/presets/load")
 async def api_load_preset(payload: dict = Body(...)):
-    global app_config, cc_map, channel_map, cc_reverse, current_preset, unsaved_changes
+    global app_config, current_preset, unsaved_changes
     name = str(payload.get("name", "")).strip()
     safe = _safe_name(name)
     if not safe:
@@ -418,34 +1187,25 @@ async def api_load_preset(payload: dict = Body(...)):
     if not os.path.exists(path):
         return {"ok": False, "error": "not found"}
     try:
-        # Load and apply
-        app_config = load_config(path)
-        labels = labels_from_config(app_config)
-        # Apply provided labels first
-        if labels:
-            apply_labels(state, labels)
-        # Clear labels for any encoder not defined in the preset ("empty encoders")
-        try:
-            snap = state.snapshot()
-            for bank in range(1, 5):
-                bank_labels = labels.get(bank, {}) if isinstance(labels, dict) else {}
-                for enc in range(1, 17):
-                    if not bank_labels.get(enc):
-                        # Preserve current value, clear label
-                        try:
-                            current_val = snap.banks[bank].encoders[enc].value
-                        except Exception:
-                            current_val = 0
-                        state.update_encoder(bank, enc, current_val, label="")
-        except Exception:
-            # If clearing fails, continue without aborting load
-            pass
-        cc_map = cc_map_from_config(app_config)
-        channel_map = channels_from_config(app_config)
-        cc_reverse = invert_cc_map(cc_map)
+        compiled = load_compiled(path)
+    except ValueError as exc:
+        # Invalid layout: refuse the preset and keep the current one
+        return {"ok": False, "error": str(exc)}
+    try:
+        # Apply
+        app_config = compiled["config"]
+        state.set_layout(**compiled["layout"])
+        labels = compiled["labels"]
+        # Apply provided labels and clear those of encoders the preset leaves
+        # empty, in one pass; values are preserved
+        state.set_labels(labels if isinstance(labels, dict) else {}, replace=True)
+        _install_mapping(compiled["cc_map"], compiled["channels"], compiled["cc_reverse"])
+        request_resync("device")
         current_preset = safe
         unsaved_changes = False
-        await broadcast({"type": "preset", "preset": current_preset, "mapping": cc_map, "channels": channel_map, "state": state.snapshot().model_dump(), "dirty": unsaved_changes})
+        # Labels and mapping were replaced wholesale; older clients need a snapshot
+        version = _reset_changes()
+        await broadcast_state("preset", preset=current_preset, version=version)
         return {"ok": True, "preset": current_preset}
     except Exception:
         return {"ok": False, "error": "load failed"}
@@ -491,18 +1251,128 @@ def api_download_preset(name: str | None = Query(None)):
         return JSONResponse({"ok": False, "error": "download failed"}, status_code=500)
 
 
+@app.get("/api/presets/export")
+def api_export_presets(
+    format: str = Query("zip", pattern="^(zip|tar)$"),
+    names: str | None = Query(None),
+    q: str | None = Query(None),
+):
+    """Stream an archive of the preset directory (zip or tar.gz).
+
+    Optionally restricted to a comma-separated list of ``names`` and/or presets
+    whose labels match the search query ``q``.
+    """
+    try:
+        selected = sorted(f for f in os.listdir(_config_dir()) if f.endswith(".json"))
+    except Exception:
+        selected = []
+    if names:
+        wanted = {_safe_name(n) for n in names.split(",")}
+        selected = [f for f in selected if f in wanted]
+    if q:
+        preset_index.refresh(_config_dir())
+        matched = {r["preset"] for r in preset_index.search(label=q, limit=len(selected) or 1)}
+        selected = [f for f in selected if f in matched]
+    # Archive support (tarfile/zipfile/gzip) is only imported when used
+    from fighterdisplay.core.archive import ARCHIVE_FORMATS, iter_export
+
+    filename = "presets.zip" if format == "zip" else "presets.tar.gz"
+    return StreamingResponse(
+        iter_export(_config_dir(), selected, format),
+        media_type=ARCHIVE_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@app.post("/api/presets/import")
+async def api_import_presets(request: Request, overwrite: bool = Query(True)):
+    """Install presets from a zip or tar(.gz) archive sent as the request body.
+
+    The upload is spooled (to disk past 1 MiB) rather than held in memory, then
+    each entry is validated and written atomically; the catalog is refreshed once.
+    Bodies over ``MAX_ARCHIVE_BYTES`` are refused with 413 while streaming.
+    """
+    import tempfile
+
+    from fighterdisplay.core import archive
+    from fighterdisplay.core.archive import import_archive
+
+    too_large = JSONResponse({"ok": False, "error": "archive too large"}, status_code=413)
+    try:
+        if int(request.headers.get("content-length", 0)) > archive.MAX_ARCHIVE_BYTES:
+            return too_large
+    except ValueError:
+        pass
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as spool:
+        received = 0
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > archive.MAX_ARCHIVE_BYTES:
+                return too_large
+            spool.write(chunk)
+        spool.seek(0)
+        result = await run_in_threadpool(import_archive, spool, _config_dir(), overwrite)
+    preset_index.refresh(_config_dir())
+    try:
+        files = sorted(f for f in os.listdir(_config_dir()) if f.endswith(".json"))
+    except Exception:
+        files = []
+    return {"ok": bool(result["imported"]) or not result["skipped"], **result, "presets": files}
+
+
 @app.websocket("/ws")
 async def ws_endpoint(ws: WebSocket):
+    if not client_gate.try_enter():
+        # Full: refuse the handshake rather than grow connection state
+        await ws.close(code=1013)
+        return
+    try:
+        await _serve_client(ws)
+    finally:
+        client_gate.leave()
+
+
+async def _serve_client(ws: WebSocket):
     await ws.accept()
+    # Optional initial subscription, e.g. /ws?banks=current or /ws?banks=1,2&visible=0
+    sub = Subscription()
+    try:
+        banks_param = ws.query_params.get("banks")
+        if banks_param:
+            sub.update({"banks": banks_param if banks_param in ("current", "all") else [int(b) for b in banks_param.split(",")]})
+        if "visible" in ws.query_params:
+            sub.update({"visible": ws.query_params["visible"] not in ("0", "false")})
+    except Exception:
+        pass
+    subscriptions[ws] = sub
     connections.add(ws)
-    # Send initial snapshot
-    await ws.send_json({"type": "init", "state": state.snapshot().model_dump(), "mapping": cc_map, "channels": channel_map, "dirty": unsaved_changes})
+    # A reconnecting client passes its last-seen version; send only the missing
+    # deltas when the change log still covers it, else a full snapshot.
+    version = changes.version
+    pending = None
+    try:
+        since = ws.query_params.get("since")
+        if since is not None:
+            pending = changes.since(int(since), ws.query_params.get("epoch"))
+    except Exception:
+        pending = None
+    if pending is not None:
+        await ws.send_text(dumps({"type": "resync", "changes": pending, "dirty": unsaved_changes, "version": version, "epoch": changes.epoch}))
+    else:
+        await ws.send_text(_message("init", banks=sub.banks_for(state.current_bank), version=version, epoch=changes.epoch))
+    startup.mark("first_client")
     try:
         # Drain incoming messages to keep the connection healthy. All updates are
-        # pushed via broadcast() (heartbeat + state changes).
+        # pushed via broadcast_state()/_fan_out() (heartbeat + state changes); the only client
+        # message acted on is {"type": "subscribe", ...}.
         while True:
             try:
-                await ws.receive_text()
+                text = await ws.receive_text()
+                if text.startswith("{"):
+                    msg = json.loads(text)
+                    if msg.get("type") == "subscribe":
+                        sub.update(msg)
+                        await ws.send_text(dumps({"type": "subscribed", **sub.describe()}))
             except WebSocketDisconnect:
                 break
             except asyncio.CancelledError:
@@ -513,6 +1383,7 @@ async def ws_endpoint(ws: WebSocket):
                 pass
     finally:
         connections.discard(ws)
+        subscriptions.pop(ws, None)
 
 # Serve static UI (mounted last so API routes take precedence)
 app.mount("/", StaticFiles(directory="src/fighterdisplay/ui/frontend", html=True), name="static")
@@ -1,7 +1,8 @@
 const statusEl = document.getElementById('status');
 const encodersEl = document.getElementById('encoders');
 const portsEl = document.getElementById('ports');
-const bankButtons = Array.from(document.querySelectorAll('.bank button'));
+const bankGroupEl = document.querySelector('.bank');
+let bankButtons = Array.from(document.querySelectorAll('.bank button'));
 const settingsToggle = document.getElementById('settings-toggle');
 const fullscreenToggle = document.getElementById('fullscreen-toggle');
 const liveView = document.getElementById('live-view');
@@ -52,6 +53,8 @@ let themeMode = 'system';
 let prefersDarkMql = null;
 let bankPos = 'above';
 let modalOpening = false;
+// Controller geometry from the server (defaults match the Midi Fighter Twister)
+let layout = { banks: 4, encoders: 16, bank_select_channel: 4, bank_select_cc: 0 };
 
 function isModalVisible() {
   const el = document.getElementById('cc-modal');
@@ -163,6 +166,9 @@ let ws = null;
 let reconnectDelay = 500; // ms
 const reconnectMax = 10000; // ms
 let keepaliveId = null;
+// Last server change-log version/epoch seen; lets reconnects resync from deltas
+let lastVersion = null;
+let serverEpoch = null;
 
 function setStatus(text, cls = '') {
   statusEl.textContent = text;
@@ -181,6 +187,10 @@ function render(state, mapping = null, dirty = null) {
     if (presetSaveCurrentBtn) presetSaveCurrentBtn.disabled = !isDirty;
   }
   const bank = state.current_bank || 1;
+  if (state.layout) {
+    layout = Object.assign({}, layout, state.layout);
+    renderBankButtons(layout.banks);
+  }
   if (mapping) {
     // Normalize mapping: either {banks:{}} or flat {bank:{encoder:cc}}
     if (mapping.banks) {
@@ -202,7 +212,7 @@ function render(state, mapping = null, dirty = null) {
   });
   const bankState = (state.banks && state.banks[bank]) || { encoders: {} };
   const encoders = bankState.encoders || {};
-  const keys = Array.from({ length: 16 }, (_, i) => i + 1);
+  const keys = Array.from({ length: layout.encoders || 16 }, (_, i) => i + 1);
   encodersEl.innerHTML = keys
     .map((k) => {
       const e = encoders[k] || { label: '', value: 0 };
@@ -227,6 +237,22 @@ function render(state, mapping = null, dirty = null) {
   }
 }
 
+// Rebuild bank buttons when the preset's bank count changes
+function renderBankButtons(count) {
+  if (!bankGroupEl || bankButtons.length === count) return;
+  bankGroupEl.innerHTML = Array.from({ length: count }, (_, i) => i + 1)
+    .map((b) => `<button data-bank="${b}" type="button" aria-label="Bank ${b}">${b}</button>`)
+    .join('');
+  bankButtons = Array.from(bankGroupEl.querySelectorAll('button'));
+}
+
+// Bank-select CC message for the current layout
+function bankSelectMessage(bank) {
+  const channel = ((layout.bank_select_channel || 4) - 1) & 0x0f;
+  const control = ((layout.bank_select_cc || 0) + bank - 1) & 0x7f;
+  return [0xB0 | channel, control, 127];
+}
+
 async function fetchPorts() {
   try {
     const res = await fetch('/api/ports');
@@ -420,19 +446,25 @@ bankPosBelowBtn?.addEventListener('click', () => applyBankPos('below'));
 function connect() {
   const proto = location.protocol === 'https:' ? 'wss' : 'ws';
   setStatus('Connecting…', 'connecting');
-  ws = new WebSocket(`${proto}://${location.host}/ws`);
+  const resume = (lastVersion != null && serverEpoch) ? `&since=${lastVersion}&epoch=${encodeURIComponent(serverEpoch)}` : '';
+  // This view only renders the current bank; hidden tabs get slow heartbeats
+  const sub = `?banks=current&visible=${document.hidden ? 0 : 1}`;
+  ws = new WebSocket(`${proto}://${location.host}/ws${sub}${resume}`);
   ws.onopen = async () => {
     setStatus('Connected', 'connected');
     reconnectDelay = 500;
-    // Prime UI with a fresh state fetch in case we missed updates
-    try {
-      const res = await fetch('/api/state');
-      const js = await res.json();
-      if (js && js.channels) {
-        chanMap = Object.fromEntries(Object.entries(js.channels).map(([b, encs]) => [parseInt(b, 10), Object.fromEntries(Object.entries(encs).map(([e, ch]) => [parseInt(e, 10), parseInt(ch, 10)]))]));
-      }
-      render(js.state || js, js.mapping, js.dirty);
-    } catch {}
+    // The server answers a resume with the missed deltas (or a full init
+    // snapshot), so only the very first connect primes via /api/state.
+    if (!resume) {
+      try {
+        const res = await fetch('/api/state');
+        const js = await res.json();
+        if (js && js.channels) {
+          chanMap = Object.fromEntries(Object.entries(js.channels).map(([b, encs]) => [parseInt(b, 10), Object.fromEntries(Object.entries(encs).map(([e, ch]) => [parseInt(e, 10), parseInt(ch, 10)]))]));
+        }
+        render(js.state || js, js.mapping, js.dirty);
+      } catch {}
+    }
     // Keepalive pings from browser side
     if (keepaliveId) clearInterval(keepaliveId);
     keepaliveId = setInterval(() => { try { ws && ws.send('ping'); } catch {} }, 15000);
@@ -451,6 +483,13 @@ function connect() {
   ws.onmessage = (ev) => {
     try {
       const msg = JSON.parse(ev.data);
+      if (msg.epoch) serverEpoch = msg.epoch;
+      if (msg.version != null) lastVersion = msg.version;
+      // Resync after reconnect and scene-morph ticks both carry encoder deltas
+      if (msg.type === 'resync' || msg.type === 'morph') {
+        applyChanges(msg.changes || [], msg.dirty);
+        return;
+      }
       if (msg.state) {
         if (msg.channels) {
           chanMap = Object.fromEntries(Object.entries(msg.channels).map(([b, encs]) => [parseInt(b, 10), Object.fromEntries(Object.entries(encs).map(([e, ch]) => [parseInt(e, 10), parseInt(ch, 10)]))]));
@@ -461,8 +500,7 @@ function connect() {
           try {
             const b = (msg.state && msg.state.current_bank) || null;
             if (b && midiOut && (!sendBankToggle || sendBankToggle.checked)) {
-              const control = (parseInt(b, 10) - 1) & 0x7f;
-              midiOut.send([0xB0 | 3, control, 127]);
+              midiOut.send(bankSelectMessage(parseInt(b, 10)));
             }
           } catch {}
         }
@@ -471,6 +509,37 @@ function connect() {
   };
 }
 
+// Tell the server when this tab is hidden so it can throttle updates
+document.addEventListener('visibilitychange', () => {
+  try {
+    if (ws && ws.readyState === WebSocket.OPEN) ws.send(JSON.stringify({ type: 'subscribe', visible: !document.hidden }));
+  } catch {}
+});
+
+// Apply change-log deltas sent by the server after a reconnect
+function applyChanges(changes, dirty) {
+  const state = JSON.parse(JSON.stringify(latestState || {}));
+  state.banks = state.banks || {};
+  let mapping = null;
+  for (const ch of changes) {
+    if (ch.type === 'encoder') {
+      const bank = state.banks[ch.bank] = state.banks[ch.bank] || { encoders: {} };
+      bank.encoders = bank.encoders || {};
+      const enc = bank.encoders[ch.encoder] = bank.encoders[ch.encoder] || { label: '', value: 0 };
+      if (ch.value != null) enc.value = ch.value;
+      if (ch.label != null) enc.label = ch.label;
+    } else if (ch.type === 'bank') {
+      state.current_bank = ch.bank;
+    } else if (ch.type === 'mapping') {
+      mapping = ch.mapping;
+      if (ch.channels) {
+        chanMap = Object.fromEntries(Object.entries(ch.channels).map(([b, encs]) => [parseInt(b, 10), Object.fromEntries(Object.entries(encs).map(([e, c]) => [parseInt(e, 10), parseInt(c, 10)]))]));
+      }
+    }
+  }
+  render(state, mapping, dirty);
+}
+
 fetchPorts();
 fetchPresets();
 connect();
@@ -485,24 +554,23 @@ applyThemeFromStorage();
 // Helper to change bank from UI/keyboard
 async function setBank(bank) {
   const b = parseInt(bank, 10);
-  if (!(b >= 1 && b <= 4)) return;
+  if (!(b >= 1 && b <= layout.banks)) return;
   try {
     await fetch('/api/bank', { method: 'POST', headers: { 'Content-Type': 'application/json' }, body: JSON.stringify({ bank: b }) });
-    // Also send bank select to the hardware via Web MIDI (channel 4 / control bank-1 / value 127)
+    // Also send bank select to the hardware via Web MIDI (Twister: channel 4 / control bank-1 / value 127)
     if (midiOut && (!sendBankToggle || sendBankToggle.checked)) {
       try {
-        const control = b - 1;
-        midiOut.send([0xB0 | 3, control & 0x7f, 127]);
+        midiOut.send(bankSelectMessage(b));
       } catch {}
     }
   } catch {}
 }
 
-bankButtons.forEach((btn) => {
-  btn.addEventListener('click', async () => {
-    const bank = parseInt(btn.dataset.bank, 10);
-    setBank(bank);
-  });
+// Delegate so buttons rebuilt for a new layout stay clickable
+bankGroupEl?.addEventListener('click', (ev) => {
+  const btn = ev.target.closest('button[data-bank]');
+  if (!btn) return;
+  setBank(parseInt(btn.dataset.bank, 10));
 });
 
 // Toggle MIDI Devices panel visibility
@@ -560,14 +628,14 @@ function isLiveMode() {
 
 // (Settings panel is toggled via the gear button together with MIDI)
 
-// Keyboard: 1-4 to select banks (when modal not visible and not typing in inputs)
+// Keyboard: 1-9 to select banks (when modal not visible and not typing in inputs)
 window.addEventListener('keydown', (e) => {
   if (isModalVisible && isModalVisible()) return;
   if (e.ctrlKey || e.metaKey || e.altKey) return;
   const tag = (document.activeElement && document.activeElement.tagName) || '';
   if (/(INPUT|TEXTAREA|SELECT)/.test(tag)) return;
   if (document.activeElement && document.activeElement.isContentEditable) return;
-  if (e.key === '1' || e.key === '2' || e.key === '3' || e.key === '4') {
+  if (/^[1-9]$/.test(e.key) && parseInt(e.key, 10) <= layout.banks) {
     e.preventDefault();
     setBank(parseInt(e.key, 10));
   }
@@ -0,0 +1,25 @@
+import time
+
+import pytest
+
+
+def _wait_for(predicate, timeout=3.0):
+    """Poll ``predicate`` until it is true (True) or ``timeout`` seconds pass (False)."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+@pytest.fixture
+def wait_for():
+    """The polling helper, for tests that wait on background threads."""
+    return _wait_for
+
+
+@pytest.fixture(autouse=True)
+def _isolated_preset_cache(tmp_path, monkeypatch):
+    # The app lifespan caches compiled presets; keep them out of the real home directory
+    monkeypatch.setenv("PRESET_CACHE_DIR", str(tmp_path / "preset-cache"))
@@ -26,3 +26,15 @@ def test_apply_labels_handles_missing_banks_and_encoders():
     assert snap.banks[3].encoders[16].label == "Level"
     assert snap.banks[3].encoders[16].value == 0
 
+
+
+def test_set_labels_replace_clears_missing_labels_in_one_version():
+    store = StateStore()
+    store.update_encoder(1, 1, 64, label="Old")
+    store.update_encoder(2, 5, 7, label="Gone")
+    version = store.version
+    assert store.set_labels({1: {2: "New"}}, replace=True) == version + 1
+    snap = store.snapshot()
+    assert (snap.banks[1].encoders[1].label, snap.banks[1].encoders[1].value) == ("", 64)
+    assert (snap.banks[2].encoders[5].label, snap.banks[2].encoders[5].value) == ("", 7)
+    assert snap.banks[1].encoders[2].label == "New"
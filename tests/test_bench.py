@@ -0,0 +1,36 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _bench(*args):
+    env = {**os.environ, "PYTHONPATH": str(ROOT / "src")}
+    return subprocess.run(
+        [sys.executable, str(ROOT / "scripts" / "bench.py"), "--quick", "-k", "invert_cc_map[small]", *args],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=120,
+    )
+
+
+def test_bench_records_baseline_and_gates_regressions(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    r = _bench("--baseline", str(baseline), "--save")
+    assert r.returncode == 0, r.stderr
+    results = json.loads(baseline.read_text())["results"]
+    assert list(results) == ["config.invert_cc_map[small]"]
+    assert results["config.invert_cc_map[small]"] > 0
+
+    # Generous threshold: same machine, same code -> passes
+    assert _bench("--baseline", str(baseline), "--threshold", "100").returncode == 0
+
+    # A baseline far faster than reality must trip the gate
+    baseline.write_text(json.dumps({"results": {"config.invert_cc_map[small]": 1e-12}}))
+    r = _bench("--baseline", str(baseline))
+    assert r.returncode == 1
+    assert "REGRESSION" in r.stdout
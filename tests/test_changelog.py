@@ -0,0 +1,59 @@
+from fighterdisplay.core.changelog import ChangeLog
+from fighterdisplay.ui.backend.main import app, changes
+from fastapi.testclient import TestClient
+
+
+def test_since_returns_coalesced_deltas():
+    log = ChangeLog(capacity=8)
+    v0 = log.version
+    log.append({"type": "encoder", "bank": 1, "encoder": 1, "value": 10, "label": "Cutoff"})
+    log.append({"type": "bank", "bank": 2})
+    log.append({"type": "encoder", "bank": 1, "encoder": 1, "value": 20})
+    deltas = log.since(v0)
+    assert [d["type"] for d in deltas] == ["bank", "encoder"]
+    enc = deltas[-1]
+    assert enc["value"] == 20
+    assert enc["label"] == "Cutoff"  # earlier label survives a value-only change
+    assert enc["version"] == log.version
+    assert log.since(log.version) == []
+
+
+def test_since_requires_snapshot_when_rolled_over_or_reset():
+    log = ChangeLog(capacity=2)
+    for i in range(3):
+        log.append({"type": "encoder", "bank": 1, "encoder": i + 1, "value": i})
+    assert log.since(0) is None  # first change fell out of the log
+    assert log.since(1) is not None
+    assert log.since(1, epoch="other-process") is None
+    v = log.reset()
+    assert log.since(v - 1) is None
+    assert log.since(v) == []
+
+
+def test_batched_values_take_one_entry_and_replay_per_encoder():
+    log = ChangeLog(capacity=2)
+    v0 = log.version
+    log.append({"type": "encoder", "bank": 1, "encoder": 1, "value": 5, "label": "Cutoff"})
+    log.append({"type": "values", "values": [[1, 1, 60], [2, 3, 7]]})
+    assert log.since(v0) == [
+        {"type": "encoder", "bank": 1, "encoder": 1, "value": 60, "label": "Cutoff", "version": v0 + 2},
+        {"type": "encoder", "bank": 2, "encoder": 3, "value": 7, "version": v0 + 2},
+    ]
+
+
+def test_ws_reconnect_gets_deltas_since_version():
+    c = TestClient(app)
+    with c.websocket_connect("/ws") as ws:
+        init = ws.receive_json()
+    assert init["type"] == "init"
+    r = c.post("/api/bank", json={"bank": 2})
+    assert r.status_code == 200
+    with c.websocket_connect(f"/ws?since={init['version']}&epoch={init['epoch']}") as ws:
+        msg = ws.receive_json()
+    assert msg["type"] == "resync"
+    assert msg["version"] == changes.version
+    assert msg["changes"][-1]["type"] == "bank"
+    assert msg["changes"][-1]["bank"] == 2
+    # An unknown epoch (e.g. server restarted) falls back to a full snapshot
+    with c.websocket_connect(f"/ws?since={init['version']}&epoch=stale") as ws:
+        assert ws.receive_json()["type"] == "init"
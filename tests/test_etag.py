@@ -0,0 +1,55 @@
+import threading
+import time
+
+from fighterdisplay.ui.backend.main import app
+from fastapi.testclient import TestClient
+
+
+def test_reads_return_304_until_something_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv('CONFIG_PATH', str(tmp_path / 'config.json'))
+    c = TestClient(app)
+    for path in ('/api/state', '/api/mapping', '/api/presets'):
+        r = c.get(path)
+        etag = r.headers['etag']
+        assert r.status_code == 200
+        r2 = c.get(path, headers={'If-None-Match': etag})
+        assert r2.status_code == 304
+        assert r2.headers['etag'] == etag
+        assert r2.content == b''
+
+    tag = c.get('/api/mapping').headers['etag']
+    assert c.post('/api/mapping/temp', json={'bank': 1, 'encoder': 3, 'cc': 40}).json()['ok'] is True
+    r = c.get('/api/mapping', headers={'If-None-Match': tag})
+    assert r.status_code == 200
+    assert r.json()['mapping']['1']['3'] == 40
+
+
+def test_state_long_poll_returns_on_change_or_timeout(tmp_path, monkeypatch):
+    monkeypatch.setenv('CONFIG_PATH', str(tmp_path / 'config.json'))
+    with TestClient(app) as c:
+        version = c.get('/api/state').json()['version']
+
+        start = time.monotonic()
+        r = c.get('/api/state', params={'wait': version, 'timeout': 0.2})
+        assert r.status_code == 200
+        assert r.json()['version'] == version
+        assert time.monotonic() - start >= 0.2
+
+        def change():
+            time.sleep(0.1)
+            c.post('/api/bank', json={'bank': 2})
+
+        t = threading.Thread(target=change)
+        t.start()
+        start = time.monotonic()
+        js = c.get('/api/state', params={'wait': version, 'timeout': 10}).json()
+        t.join()
+        assert time.monotonic() - start < 5
+        assert js['version'] > version
+        assert js['state']['current_bank'] == 2
+
+        # A poller from before a restart (version ahead, or another epoch) is not parked
+        start = time.monotonic()
+        assert c.get('/api/state', params={'wait': js['version'] + 1000, 'timeout': 10}).json()['epoch'] == js['epoch']
+        c.get('/api/state', params={'wait': js['version'], 'epoch': 'stale', 'timeout': 10})
+        assert time.monotonic() - start < 5
@@ -0,0 +1,83 @@
+import json
+
+import pytest
+
+from fighterdisplay.core.config import DEFAULT_LAYOUT, layout_from_config
+from fighterdisplay.core.state import StateStore
+from fighterdisplay.ui.backend import main
+from fighterdisplay.ui.backend.main import app, state
+from fastapi.testclient import TestClient
+
+
+def test_layout_defaults_to_twister_and_reads_preset_override():
+    assert layout_from_config({"banks": {}}) == DEFAULT_LAYOUT
+    layout = layout_from_config({"layout": {"banks": 32, "encoders": "8"}})
+    assert layout["banks"] == 32
+    assert layout["encoders"] == 8
+    assert layout["bank_select_channel"] == DEFAULT_LAYOUT["bank_select_channel"]
+    assert layout_from_config({"layout": {"banks": 28, "bank_select_cc": 100}})["banks"] == 28
+    # Bank 29 would need CC 128: rejected rather than sharing another bank's CC
+    with pytest.raises(ValueError):
+        layout_from_config({"layout": {"banks": 29, "bank_select_cc": 100}})
+
+
+def test_preset_with_overflowing_bank_select_is_refused(tmp_path, monkeypatch):
+    (tmp_path / "wide.json").write_text(json.dumps({"layout": {"banks": 128, "bank_select_cc": 1}, "banks": {}}))
+    monkeypatch.setenv("CONFIG_PATH", str(tmp_path / "current.json"))
+    with TestClient(app) as c:
+        before = state.layout()
+        r = c.post("/api/presets/load", json={"name": "wide"}).json()
+        assert r["ok"] is False and "CC 127" in r["error"]
+        assert state.layout() == before
+
+
+def test_state_storage_is_sparse():
+    store = StateStore()
+    assert store.snapshot().banks == {}
+    store.update_encoder(30, 12, 5)
+    snap = store.snapshot()
+    assert list(snap.banks) == [30]
+    assert list(snap.banks[30].encoders) == [12]
+
+
+def test_preset_layout_drives_bank_select(tmp_path, monkeypatch):
+    preset = {"layout": {"banks": 32, "encoders": 16}, "banks": {"21": {"encoders": {"1": {"label": "Page21", "cc": 40}}}}}
+    (tmp_path / "pages.json").write_text(json.dumps(preset))
+    monkeypatch.setenv("CONFIG_PATH", str(tmp_path / "current.json"))
+    c = TestClient(app)
+    try:
+        r = c.post("/api/presets/load", json={"name": "pages"})
+        assert r.json()["ok"] is True
+        assert state.layout().banks == 32
+        # Bank select beyond the Twister's 4 banks: CC 20 on channel 4 -> bank 21
+        r = c.post("/api/midi", json={"type": "control_change", "control": 20, "value": 127, "channel": 3})
+        assert r.status_code == 200
+        snap = state.snapshot()
+        assert snap.current_bank == 21
+        assert snap.banks[21].encoders[1].label == "Page21"
+    finally:
+        state.set_layout(**DEFAULT_LAYOUT)
+        state.set_bank(1)
+
+
+def test_loading_a_smaller_preset_shrinks_stored_state(tmp_path, monkeypatch):
+    big = {
+        "layout": {"banks": 32, "encoders": 16},
+        "banks": {str(b): {"encoders": {str(e): {"label": f"B{b}E{e}"} for e in range(1, 17)}} for b in range(1, 33)},
+    }
+    small = {"layout": {"banks": 4}, "banks": {"2": {"encoders": {"3": {"label": "Only"}}}}}
+    (tmp_path / "big.json").write_text(json.dumps(big))
+    (tmp_path / "small.json").write_text(json.dumps(small))
+    monkeypatch.setenv("CONFIG_PATH", str(tmp_path / "current.json"))
+    store = StateStore()
+    monkeypatch.setattr(main, "state", store)
+    c = TestClient(app)
+    assert c.post("/api/presets/load", json={"name": "big"}).json()["ok"] is True
+    store.update_encoder(20, 1, 99)
+    store.update_encoder(1, 5, 42)
+    assert len(store.dump()["banks"]) == 32
+    assert c.post("/api/presets/load", json={"name": "small"}).json()["ok"] is True
+    banks = store.dump()["banks"]
+    # Only the defined label and the encoder holding a value are left
+    assert {b: sorted(bs["encoders"]) for b, bs in banks.items()} == {1: [5], 2: [3]}
+    assert banks[1]["encoders"][5] == {"label": "", "value": 42}
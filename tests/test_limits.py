@@ -0,0 +1,100 @@
+import asyncio
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from fighterdisplay.core.limits import Gate
+from fighterdisplay.midi.scheduler import OutputScheduler
+from fighterdisplay.ui.backend import main
+from fighterdisplay.ui.backend.main import app
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_gate_and_live_lane_count_overflow():
+    gate = Gate(2)
+    assert gate.try_enter() and gate.try_enter()
+    assert not gate.try_enter()
+    gate.leave()
+    assert gate.try_enter()
+    assert gate.stats() == {"active": 2, "limit": 2, "admitted": 3, "rejected": 1, "peak": 2}
+
+    sched = OutputScheduler(rate=1000, burst=8, max_live=4)
+    for value in range(10):
+        sched.push_live(0, 1, value)
+    assert sched.stats()["live"] == 4 and sched.stats()["dropped"] == 6
+    # Oldest dropped: the newest values survive
+    assert [v for _, _, v in sched.take(now=0.0)] == [6, 7, 8, 9]
+
+
+def test_schedule_drops_spawns_over_the_cap(monkeypatch):
+    loop = asyncio.new_event_loop()  # never run: spawned coroutines stay pending
+    monkeypatch.setattr(main, "_main_loop", loop)
+    monkeypatch.setattr(main, "broadcast_gate", Gate(3))
+
+    async def noop():
+        pass
+
+    try:
+        for _ in range(10):
+            main._schedule(noop())
+        assert main.broadcast_gate.stats()["active"] == 3
+        assert main.broadcast_gate.stats()["rejected"] == 7
+    finally:
+        for task in asyncio.all_tasks(loop):
+            task.cancel()
+        loop.run_until_complete(asyncio.sleep(0))
+        loop.close()
+
+
+def test_change_notifications_are_coalesced(monkeypatch):
+    loop = asyncio.new_event_loop()
+    monkeypatch.setattr(main, "_main_loop", loop)
+    monkeypatch.setattr(main, "wake_stats", {"scheduled": 0, "coalesced": 0})
+    try:
+        # A flood while the loop is busy queues one wake, not one per change
+        for _ in range(100):
+            main._notify_update()
+        assert len(loop._ready) == 1
+        assert main.wake_stats == {"scheduled": 1, "coalesced": 99}
+        loop.run_until_complete(asyncio.sleep(0))
+        assert main.update_event.is_set()
+        main._notify_update()
+        assert main.wake_stats == {"scheduled": 2, "coalesced": 99}
+        loop.run_until_complete(asyncio.sleep(0))
+    finally:
+        loop.close()
+    assert main._wake_pending is None
+
+
+def test_clients_over_the_cap_are_refused(tmp_path, monkeypatch):
+    monkeypatch.setenv('CONFIG_PATH', str(tmp_path / 'config.json'))
+    monkeypatch.setattr(main, "client_gate", Gate(1))
+    c = TestClient(app)
+    with c.websocket_connect('/ws') as ws:
+        ws.receive_json()
+        with pytest.raises(WebSocketDisconnect) as exc:
+            with c.websocket_connect('/ws'):
+                pass
+        assert exc.value.code == 1013
+    stats = c.get('/api/stats').json()
+    assert stats['clients']['rejected'] == 1
+    assert stats['clients']['active'] == 0
+
+
+def test_soak_smoke_run_passes():
+    env = {**os.environ, "PYTHONPATH": str(ROOT / "src"), "PRESET_CACHE_DIR": "off"}
+    r = subprocess.run(
+        [sys.executable, str(ROOT / "scripts" / "soak.py"), "--hours", "0.1", "--rate", "2"],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=240,
+    )
+    assert r.returncode == 0, r.stdout + r.stderr
+    assert "overflow counters" in r.stdout
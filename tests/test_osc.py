@@ -0,0 +1,88 @@
+import socket
+import struct
+
+from fastapi.testclient import TestClient
+
+from fighterdisplay.core.osc import OscFanout, osc_message, parse_targets
+from fighterdisplay.ui.backend import main
+from fighterdisplay.ui.backend.main import app
+
+
+def _listener():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.bind(("127.0.0.1", 0))
+    sock.settimeout(2.0)
+    return sock
+
+
+def _parse_bundle(packet):
+    """[(address, typetags, raw args)] from an OSC bundle."""
+    assert packet.startswith(b"#bundle\0")
+    pos, out = 16, []
+    while pos < len(packet):
+        (size,) = struct.unpack(">i", packet[pos:pos + 4])
+        msg = packet[pos + 4:pos + 4 + size]
+        addr_end = msg.index(b"\0")
+        tags_start = (addr_end // 4 + 1) * 4
+        tags_end = msg.index(b"\0", tags_start)
+        args_start = (tags_end // 4 + 1) * 4
+        out.append((msg[:addr_end].decode(), msg[tags_start:tags_end].decode(), msg[args_start:]))
+        pos += 4 + size
+    return out
+
+
+def test_osc_encoding_and_frame_bundling():
+    assert osc_message("/a", 1) == b"/a\0\0,i\0\0\0\0\0\x01"
+    assert parse_targets("127.0.0.1:9000, bad, host:0, lights:8000") == [("127.0.0.1", 9000), ("lights", 8000)]
+    rx = _listener()
+    fanout = OscFanout([rx.getsockname()], prefix="fx")
+    fanout.push(1, 2, 10)
+    fanout.push(1, 2, 127)  # same encoder within a frame: latest wins
+    fanout.push_many([(2, 3, 0)])
+    fanout.push_bank(2)
+    assert fanout.flush() == 1
+    messages = _parse_bundle(rx.recv(2048))
+    assert [(a, t) for a, t, _ in messages] == [("/fx/bank", ",i"), ("/fx/1/2", ",if"), ("/fx/2/3", ",if")]
+    assert struct.unpack(">if", messages[1][2]) == (127, 1.0)
+    assert fanout.flush() == 0  # nothing pending, nothing sent
+    # A big frame is split into MTU-sized bundles
+    fanout.push_many((1, e, 64) for e in range(1, 129))
+    packets = fanout.flush()
+    assert packets > 1
+    assert sum(len(_parse_bundle(rx.recv(2048))) for _ in range(packets)) == 128
+    fanout.close()
+    rx.close()
+
+
+def test_osc_reports_the_first_change_of_a_frame():
+    fanout = OscFanout([], prefix="fx")
+    calls = []
+    fanout.on_ready = lambda: calls.append(True)
+    fanout.push(1, 1, 1)
+    fanout.push_bank(2)
+    fanout.push_many([(1, 2, 3)])
+    assert len(calls) == 1
+    fanout.flush()
+    fanout.push_many([])
+    assert len(calls) == 1  # nothing pending after an empty push
+    fanout.push_bank(1)
+    assert len(calls) == 2
+    fanout.close()
+
+
+def test_server_sends_encoder_changes_over_osc(tmp_path, monkeypatch):
+    monkeypatch.setenv('CONFIG_PATH', str(tmp_path / 'config.json'))
+    rx = _listener()
+    host, port = rx.getsockname()
+    monkeypatch.setattr(main, "OSC_TARGETS", f"{host}:{port}")
+    with TestClient(app) as c:
+        c.post('/api/mapping/temp', json={'bank': 3, 'encoder': 7, 'cc': 60})
+        c.post('/api/midi', json={'control': 60, 'value': 42, 'channel': 0})
+        received = []
+        while ("/ringside/3/7", ",if") not in [(a, t) for a, t, _ in received]:
+            received += _parse_bundle(rx.recv(2048))
+        args = dict((a, raw) for a, _, raw in received)
+        assert struct.unpack(">i", args["/ringside/bank"])[0] == 3
+        assert struct.unpack(">if", args["/ringside/3/7"])[0] == 42
+        assert c.get('/api/stats').json()['osc']['sent'] >= 1
+    rx.close()
@@ -0,0 +1,92 @@
+import time
+
+from fighterdisplay.midi.scheduler import OutputScheduler
+from fighterdisplay.ui.backend.main import app, midi_output
+from fastapi.testclient import TestClient
+
+
+def test_take_is_paced_by_token_bucket():
+    sched = OutputScheduler(rate=1000, burst=4)
+    sched.push_bulk((0, cc, 64) for cc in range(10))
+    assert len(sched.take(now=0.0)) == 4
+    assert sched.take(now=0.0) == []
+    # 3 ms at 1000 msg/s refills three tokens
+    assert len(sched.take(now=0.003)) == 3
+    assert sched.pending() == 3
+
+
+def test_live_goes_first_and_shown_values_are_skipped():
+    sched = OutputScheduler(rate=1000, burst=3)
+    sched.mark_shown(0, 1, 10)
+    queued = sched.push_bulk([(0, 1, 10), (0, 2, 20), (0, 3, 30)])
+    assert queued == 2  # CC 1 already shows 10
+    sched.push_live(0, 3, 99)  # supersedes the pending bulk value for CC 3
+    sched.push_live(3, 0, 127)
+    assert sched.take(now=0.0) == [(0, 3, 99), (3, 0, 127), (0, 2, 20)]
+    # Resyncing again sends nothing: the device already shows these values
+    assert sched.push_bulk([(0, 2, 20), (0, 3, 99)]) == 0
+
+
+def test_sysex_frames_share_the_budget_by_size():
+    sched = OutputScheduler(rate=1000, burst=10)
+    small, large = b"\xf0" + bytes(10) + b"\xf7", b"\xf0" + bytes(58) + b"\xf7"  # 4 and 20 CCs' worth
+    sched.push_live(0, 1, 1)
+    sched.push_sysex(small)
+    sched.push_sysex(large)
+    sched.push_bulk([(0, 2, 2)])
+    # Live first, then the small frame; the large one waits for a full bucket
+    assert sched.take(now=0.0) == [(0, 1, 1), small]
+    assert sched.take(now=0.004) == []
+    assert sched.take(now=0.005) == [large]
+    # ... and leaves the bucket in debt, so the byte rate still holds
+    assert sched.take(now=0.010) == []
+    assert sched.take(now=0.016) == [(0, 2, 2)]
+    assert sched.stats()["sysex"] == 0
+
+
+def test_on_ready_fires_when_the_queue_stops_being_empty():
+    sched = OutputScheduler(rate=1000, burst=8)
+    calls = []
+    sched.on_ready = lambda: calls.append(sched.pending())
+    sched.push_live(0, 1, 1)
+    sched.push_live(0, 2, 2)
+    sched.push_sysex(b"\xf0\xf7")
+    assert calls == [1]
+    sched.take(now=0.0)
+    sched.mark_shown(0, 3, 3)
+    assert sched.push_bulk([(0, 3, 3)]) == 0  # nothing queued, nothing to wake for
+    sched.push_bulk([(0, 4, 4)])
+    assert calls == [1, 1]
+
+
+def test_output_pump_sleeps_while_nothing_is_queued(tmp_path, monkeypatch):
+    monkeypatch.setenv('CONFIG_PATH', str(tmp_path / 'config.json'))
+    taken = []
+    take = midi_output.take
+    with TestClient(app):
+        deadline = time.monotonic() + 2.0
+        while midi_output.pending() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        monkeypatch.setattr(midi_output, "take", lambda now=None: taken.append(now) or take(now))
+        time.sleep(0.2)
+        assert taken == []  # a polling pump would have run ~100 times
+        midi_output.push_live(0, 1, 1)
+        deadline = time.monotonic() + 1.0
+        while (not taken or midi_output.pending()) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert taken and midi_output.pending() == 0
+
+
+def test_api_resync_queues_device_values(tmp_path, monkeypatch):
+    monkeypatch.setenv('CONFIG_PATH', str(tmp_path / 'config.json'))
+    c = TestClient(app)
+    assert c.post('/api/mapping', json={'bank': 1, 'encoder': 1, 'cc': 30, 'channel': 2}).json()['ok']
+    midi_output.forget()
+    r = c.post('/api/resync', json={'scope': 'device'})
+    js = r.json()
+    assert js['ok'] is True and js['scope'] == 'device'
+    assert js['queued'] >= 1
+    # Nothing changed since, so a second resync has nothing to send
+    while midi_output.take(now=1e9):
+        pass
+    assert c.post('/api/resync', json={'scope': 'device'}).json()['queued'] == 0
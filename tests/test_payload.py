@@ -0,0 +1,40 @@
+import json
+
+from fighterdisplay.core.payload import FragmentCache, assemble, dumps
+from fighterdisplay.ui.backend.main import app
+from fastapi.testclient import TestClient
+
+
+def test_assemble_matches_plain_encoding():
+    mapping = {1: {1: 14, 2: 15}}
+    cache = FragmentCache()
+    msg = assemble({"mapping": cache.get("mapping", 1, lambda: mapping)}, {"type": "heartbeat", "dirty": False})
+    assert json.loads(msg) == json.loads(json.dumps({"mapping": mapping, "type": "heartbeat", "dirty": False}))
+    assert json.loads(assemble({"a": dumps([1])}, {})) == {"a": [1]}
+
+
+def test_fragment_cache_reencodes_only_on_new_version():
+    calls = []
+
+    def build():
+        calls.append(1)
+        return {"x": len(calls)}
+
+    cache = FragmentCache()
+    first = cache.get("block", 1, build)
+    assert cache.get("block", 1, build) is first
+    assert len(calls) == 1
+    assert cache.get("block", 2, build) != first
+    assert len(calls) == 2
+
+
+def test_state_endpoint_reflects_mapping_and_label_changes(tmp_path, monkeypatch):
+    monkeypatch.setenv('CONFIG_PATH', str(tmp_path / 'config.json'))
+    c = TestClient(app)
+    c.get('/api/state')  # populate the cached blocks
+    r = c.post('/api/mapping/temp', json={'bank': 2, 'encoder': 4, 'cc': 33, 'label': 'Width'})
+    assert r.json()['ok'] is True
+    js = c.get('/api/state').json()
+    assert js['mapping']['2']['4'] == 33
+    assert js['state']['banks']['2']['encoders']['4']['label'] == 'Width'
+    assert js['dirty'] is True
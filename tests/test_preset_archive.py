@@ -0,0 +1,67 @@
+import io
+import json
+import tarfile
+import zipfile
+
+from fighterdisplay.ui.backend.main import app
+from fastapi.testclient import TestClient
+
+
+def _preset(label):
+    return {"banks": {"1": {"encoders": {"1": {"id": 1, "label": label, "cc": 14, "channel": 1}}}}}
+
+
+def test_export_streams_zip_and_tar_of_selected_presets(tmp_path, monkeypatch):
+    for name in ("a", "b", "c"):
+        (tmp_path / f"{name}.json").write_text(json.dumps(_preset(name.upper())))
+    monkeypatch.setenv("CONFIG_PATH", str(tmp_path / "a.json"))
+    c = TestClient(app)
+    r = c.get("/api/presets/export")
+    assert r.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(r.content)) as zf:
+        assert sorted(zf.namelist()) == ["a.json", "b.json", "c.json"]
+        assert json.loads(zf.read("b.json"))["banks"]["1"]["encoders"]["1"]["label"] == "B"
+    r = c.get("/api/presets/export", params={"format": "tar", "names": "a,c"})
+    with tarfile.open(fileobj=io.BytesIO(r.content), mode="r:gz") as tf:
+        assert sorted(tf.getnames()) == ["a.json", "c.json"]
+
+
+def test_import_validates_entries_and_writes_presets(tmp_path, monkeypatch):
+    monkeypatch.setenv("CONFIG_PATH", str(tmp_path / "current.json"))
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("rig/Lead.json", json.dumps(_preset("Lead")))
+        zf.writestr("broken.json", "{not json")
+        zf.writestr("list.json", "[1, 2]")
+        zf.writestr("wide.json", json.dumps({"layout": {"banks": 128, "bank_select_cc": 1}, "banks": {}}))
+        zf.writestr("../escape.json", json.dumps(_preset("x")))
+        zf.writestr("notes.txt", "hello")
+    c = TestClient(app)
+    r = c.post("/api/presets/import", content=buf.getvalue(), headers={"Content-Type": "application/zip"})
+    js = r.json()
+    assert js["ok"] is True
+    assert sorted(js["imported"]) == ["Lead.json", "escape.json"]  # directories are flattened
+    assert {s["name"] for s in js["skipped"]} == {"broken.json", "list.json", "notes.txt", "wide.json"}
+    # A layout that loading would refuse is skipped with the same reason
+    assert "CC 127" in next(s["error"] for s in js["skipped"] if s["name"] == "wide.json")
+    assert not (tmp_path / "wide.json").exists()
+    assert "Lead.json" in js["presets"]
+    assert json.loads((tmp_path / "Lead.json").read_text())["banks"]["1"]["encoders"]["1"]["label"] == "Lead"
+    assert not (tmp_path.parent / "escape.json").exists()
+    # Imported presets are immediately searchable
+    hits = c.get("/api/presets/search", params={"q": "lead"}).json()["results"]
+    assert [h["preset"] for h in hits] == ["Lead.json"]
+
+
+def test_import_refuses_oversized_archives(tmp_path, monkeypatch):
+    from fighterdisplay.core import archive
+
+    monkeypatch.setenv("CONFIG_PATH", str(tmp_path / "current.json"))
+    monkeypatch.setattr(archive, "MAX_ARCHIVE_BYTES", 1000)
+    c = TestClient(app)
+    r = c.post("/api/presets/import", content=b"x" * 1001, headers={"Content-Type": "application/zip"})
+    assert r.status_code == 413 and r.json()["ok"] is False
+    # Without a Content-Length the limit applies while streaming
+    r = c.post("/api/presets/import", content=iter([b"x" * 600] * 2), headers={"Content-Type": "application/zip"})
+    assert r.status_code == 413
+    assert not list(tmp_path.glob("*.json"))
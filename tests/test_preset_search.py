@@ -0,0 +1,45 @@
+import json
+import os
+
+from fighterdisplay.core.search import PresetIndex
+from fighterdisplay.ui.backend.main import app
+from fastapi.testclient import TestClient
+
+
+def _write(path, banks):
+    path.write_text(json.dumps({"banks": banks}))
+
+
+def test_index_answers_label_and_cc_queries_and_reindexes_by_mtime(tmp_path):
+    _write(tmp_path / "a.json", {"1": {"encoders": {"1": {"label": "Cutoff", "cc": 14, "channel": 2}}}})
+    _write(tmp_path / "b.json", {"2": {"encoders": {"3": {"label": "Reverb Send", "cc": 14}}}})
+    index = PresetIndex()
+    assert index.refresh(tmp_path) == 2
+    assert index.refresh(tmp_path) == 0  # nothing changed on disk
+
+    hits = index.search(label="cut")
+    assert [h["preset"] for h in hits] == ["a.json"]
+    assert hits[0]["matches"][0]["bank"] == 1
+    assert [h["preset"] for h in index.search(label="send reverb")] == ["b.json"]
+    assert [h["preset"] for h in index.search(cc=14)] == ["a.json", "b.json"]
+    assert [h["preset"] for h in index.search(cc=14, channel=2)] == ["a.json"]
+
+    _write(tmp_path / "a.json", {"1": {"encoders": {"1": {"label": "Drive", "cc": 20}}}})
+    st = os.stat(tmp_path / "a.json")
+    os.utime(tmp_path / "a.json", ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000))
+    (tmp_path / "b.json").unlink()
+    assert index.refresh(tmp_path) == 2
+    assert index.search(label="cutoff") == []
+    assert index.search(cc=14) == []
+    assert [h["preset"] for h in index.search(label="drive")] == ["a.json"]
+
+
+def test_search_endpoint(tmp_path, monkeypatch):
+    _write(tmp_path / "synth.json", {"1": {"encoders": {"5": {"label": "Amp Attack", "cc": 18}}}})
+    monkeypatch.setenv("CONFIG_PATH", str(tmp_path / "synth.json"))
+    c = TestClient(app)
+    js = c.get("/api/presets/search", params={"q": "attack"}).json()
+    assert js["ok"] is True
+    assert js["results"][0]["preset"] == "synth.json"
+    assert js["results"][0]["matches"][0]["cc"] == 18
+    assert c.get("/api/presets/search").status_code == 400
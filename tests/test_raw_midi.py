@@ -0,0 +1,73 @@
+from fighterdisplay.midi.device import RawOutput, cc_frame, parse_cc, send_cc, send_cc_batch
+from fighterdisplay.ui.backend.main import app, process_cc, state
+from fastapi.testclient import TestClient
+
+
+class _MessagePort:
+    def __init__(self):
+        self.sent = []
+
+    def send_message(self, msg):
+        self.sent.append(bytes(msg))
+
+
+class _BytesPort(_MessagePort):
+    def send_bytes(self, buf):
+        self.sent.append(bytes(buf))
+
+
+def test_cc_frame_and_parse_roundtrip():
+    frame = cc_frame(14, 99, channel=1)
+    assert frame == bytes((0xB1, 14, 99))
+    assert parse_cc(frame) == (1, 14, 99)
+    assert parse_cc(bytes((0x91, 60, 100))) is None  # note on, not CC
+    assert parse_cc(bytes((0xB0, 1))) is None
+
+
+def test_raw_output_writes_frames_and_batches_when_supported():
+    per_message = _MessagePort()
+    assert send_cc(RawOutput(per_message), 14, 64, 0)
+    assert send_cc_batch(RawOutput(per_message), [(0, 1, 2), (3, 0, 127)])
+    assert per_message.sent == [bytes((0xB0, 14, 64)), bytes((0xB0, 1, 2)), bytes((0xB3, 0, 127))]
+    batched = _BytesPort()
+    assert send_cc_batch(RawOutput(batched), [(0, 1, 2), (3, 0, 127)])
+    assert batched.sent == [bytes((0xB0, 1, 2, 0xB3, 0, 127))]
+
+
+def test_process_cc_tuple_updates_mapped_encoder(tmp_path, monkeypatch):
+    monkeypatch.setenv('CONFIG_PATH', str(tmp_path / 'config.json'))
+    c = TestClient(app)
+    r = c.post('/api/mapping', json={'bank': 1, 'encoder': 3, 'cc': 21})
+    assert r.json()['ok'] is True
+    process_cc((0, 21, 77))
+    assert state.snapshot().banks[1].encoders[3].value == 77
+
+
+def test_set_value_clamps_without_snapshot():
+    from fighterdisplay.core.state import StateStore
+
+    store = StateStore()
+    version = store.version
+    assert store.set_value(2, 5, 300) == 127
+    assert store.set_value(2, 5, -4) == 0
+    assert store.version == version + 2
+    assert store.dump()["last_message"] == {"bank": 2, "encoder": 5, "value": 0}
+
+
+def test_process_cc_reads_bank_select_without_copying_the_layout(monkeypatch):
+    from fighterdisplay.core.config import DEFAULT_LAYOUT
+    from fighterdisplay.core.state import Layout
+
+    state.set_layout(**{**DEFAULT_LAYOUT, "banks": 8, "bank_select_cc": 10})
+    try:
+        assert state.bank_select == (DEFAULT_LAYOUT["bank_select_channel"] - 1, 10, 8)
+
+        def no_copy(*args, **kwargs):
+            raise AssertionError("layout copied on the CC path")
+
+        monkeypatch.setattr(Layout, "model_copy", no_copy)
+        process_cc((state.bank_select[0], 16, 127))
+        assert state.current_bank == 7
+    finally:
+        state.set_layout(**DEFAULT_LAYOUT)
+        state.set_bank(1)
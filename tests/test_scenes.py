@@ -0,0 +1,65 @@
+import time
+
+from fighterdisplay.core.scenes import Morph, capture
+from fighterdisplay.core.state import StateStore
+from fighterdisplay.ui.backend.main import app
+from fastapi.testclient import TestClient
+
+
+def test_morph_interpolates_and_reports_only_changed_values():
+    start = {(1, 1): 0, (1, 2): 100, (2, 1): 50}
+    target = {(1, 1): 127, (1, 2): 100, (2, 1): 60}
+    m = Morph(start, target, duration=1.0, now=0.0)
+    assert m.step(0.0) == []  # nothing moved yet
+    assert m.step(0.5) == [(1, 1, 64), (2, 1, 55)]  # unchanged encoder (1, 2) is skipped
+    assert m.step(0.5) == []
+    assert m.step(2.0) == [(1, 1, 127), (2, 1, 60)]
+    assert m.done
+
+
+def test_morph_curves_and_batch_apply():
+    ease = Morph({(1, 1): 0}, {(1, 1): 100}, duration=1.0, curve="ease_in", now=0.0)
+    assert ease.step(0.5) == [(1, 1, 25)]
+    store = StateStore()
+    store.update_encoder(1, 1, 10, label="Cutoff")
+    version = store.version
+    assert store.set_values([(1, 1, 90), (3, 2, 200)]) == version + 1
+    assert capture(store) == {(1, 1): 90, (3, 2): 127}
+    assert store.snapshot().banks[1].encoders[1].label == "Cutoff"
+
+
+def test_scene_morph_endpoint_streams_deltas(tmp_path, monkeypatch):
+    monkeypatch.setenv('CONFIG_PATH', str(tmp_path / 'config.json'))
+    with TestClient(app) as c:
+        c.post('/api/mapping/temp', json={'bank': 1, 'encoder': 1, 'cc': 20})
+        c.post('/api/midi', json={'control': 20, 'value': 0, 'channel': 0})
+        assert c.post('/api/scenes', json={'name': 'low'}).json()['ok'] is True
+        c.post('/api/midi', json={'control': 20, 'value': 120, 'channel': 0})
+        assert c.post('/api/scenes', json={'name': 'high'}).json()['ok'] is True
+        assert c.get('/api/scenes/high').json()['values']['1']['1'] == 120
+        with c.websocket_connect('/ws') as ws:
+            ws.receive_json()  # init
+            r = c.post('/api/scenes/morph', json={'to': 'low', 'duration': 0.1, 'curve': 'ease_out'})
+            assert r.json()['ok'] is True
+            seen = []
+            while not seen or seen[-1] != 0:
+                msg = ws.receive_json()
+                if msg.get('type') == 'morph':
+                    seen += [ch['value'] for ch in msg['changes'] if (ch['bank'], ch['encoder']) == (1, 1)]
+        assert seen[0] < 120 and seen == sorted(seen, reverse=True)
+        deadline = time.monotonic() + 2
+        while c.get('/api/scenes').json()['morph'] is not None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert c.get('/api/state').json()['state']['banks']['1']['encoders']['1']['value'] == 0
+        assert c.post('/api/scenes/morph', json={'to': 'nope'}).json()['ok'] is False
+        assert c.post('/api/scenes/morph', json={'to': 'high', 'curve': 'bogus'}).json()['ok'] is False
+
+
+def test_apply_values_logs_one_change_per_batch():
+    from fighterdisplay.ui.backend import main
+
+    before = main.changes.version
+    updates = [(1, e, e) for e in range(1, 65)]
+    assert main._apply_values(updates) == before + 1
+    replay = main.changes.since(before)
+    assert len(replay) == 64 and replay[-1] == {"type": "encoder", "bank": 1, "encoder": 64, "value": 64, "version": before + 1}
@@ -0,0 +1,46 @@
+import struct
+
+import pytest
+from fastapi.testclient import TestClient
+
+from fighterdisplay.core.shm import SEQ_OFFSET, ValueExport, ValueReader
+from fighterdisplay.ui.backend import main
+from fighterdisplay.ui.backend.main import app
+
+
+def test_export_roundtrip_and_seqlock(tmp_path):
+    path = tmp_path / "values"
+    export = ValueExport(path, epoch=0xABC)
+    export.write_all({"current_bank": 2, "layout": {"banks": 4, "encoders": 16},
+                      "banks": {1: {"encoders": {1: {"value": 10}}}, 2: {"encoders": {16: {"value": 99}}}}}, version=5)
+    with ValueReader(path) as reader:
+        snap = reader.read()
+        assert (snap.version, snap.epoch, snap.current_bank, snap.banks, snap.encoders) == (5, 0xABC, 2, 4, 16)
+        assert snap.value(1, 1) == 10 and snap.value(2, 16) == 99 and snap.value(3, 3) == 0
+        seq = reader.sequence
+        export.write([(1, 1, 200)], current_bank=3, version=6)
+        assert reader.sequence == seq + 2
+        assert reader.value(1, 1) == 127
+        assert reader.read().current_bank == 3
+        # A writer stuck mid-update (odd sequence) makes readers retry, then give up
+        export._map[SEQ_OFFSET:SEQ_OFFSET + 8] = struct.pack("<Q", seq + 3)
+        with pytest.raises(TimeoutError):
+            reader.read(retries=5)
+    export.close()
+    assert not path.exists()
+
+
+def test_server_publishes_live_values(tmp_path, monkeypatch):
+    monkeypatch.setenv('CONFIG_PATH', str(tmp_path / 'config.json'))
+    path = tmp_path / "values"
+    monkeypatch.setattr(main, "SHM_EXPORT", str(path))
+    with TestClient(app) as c:
+        c.post('/api/mapping/temp', json={'bank': 2, 'encoder': 5, 'cc': 50})
+        c.post('/api/midi', json={'control': 50, 'value': 77, 'channel': 0})
+        with ValueReader(path) as reader:
+            snap = reader.read()
+            assert snap.value(2, 5) == 77
+            assert snap.current_bank == 2
+            assert snap.version == c.get('/api/state').json()['version']
+            assert snap.epoch == int(main.changes.epoch, 16)
+    assert not path.exists()
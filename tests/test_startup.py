@@ -0,0 +1,59 @@
+import json
+import subprocess
+import sys
+
+from fighterdisplay.core.cache import load_compiled
+from fighterdisplay.ui.backend.main import app
+from fastapi.testclient import TestClient
+
+
+def test_compiled_preset_cache_roundtrip_and_invalidation(tmp_path, monkeypatch):
+    monkeypatch.setenv("PRESET_CACHE_DIR", str(tmp_path / "cache"))
+    preset = tmp_path / "p.json"
+    preset.write_text(json.dumps({"banks": {"2": {"encoders": {"3": {"label": "Drive", "cc": 40, "channel": 5}}}}}))
+    first = load_compiled(preset)
+    assert list((tmp_path / "cache").iterdir())
+    second = load_compiled(preset)  # served from the cache file
+    assert second == first
+    assert second["labels"] == {2: {3: "Drive"}}
+    assert second["cc_reverse"] == {40: (2, 3)}
+    assert second["channels"] == {2: {3: 5}}
+    # Editing the preset invalidates the cached entry
+    preset.write_text(json.dumps({"banks": {"2": {"encoders": {"3": {"label": "Fuzz", "cc": 41}}}}}))
+    assert load_compiled(preset)["labels"] == {2: {3: "Fuzz"}}
+
+
+def test_compiled_preset_cache_evicts_deleted_and_oldest(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setenv("PRESET_CACHE_DIR", str(cache))
+    monkeypatch.setattr("fighterdisplay.core.cache.MAX_CACHE_ENTRIES", 3)
+    presets = []
+    for i in range(5):
+        preset = tmp_path / f"p{i}.json"
+        preset.write_text(json.dumps({"banks": {}}))
+        presets.append(preset)
+    load_compiled(presets[0])
+    presets[0].unlink()
+    load_compiled(presets[1])
+    assert len(list(cache.glob("*.bin"))) == 1  # entry of the deleted preset is gone
+    for preset in presets[2:]:
+        load_compiled(preset)
+    assert len(list(cache.glob("*.bin"))) == 3
+
+
+def test_startup_phases_are_exposed(tmp_path, monkeypatch):
+    monkeypatch.setenv("PRESET_CACHE_DIR", "off")
+    monkeypatch.setenv("CONFIG_PATH", str(tmp_path / "config.json"))
+    with TestClient(app) as c:
+        with c.websocket_connect("/ws") as ws:
+            ws.receive_json()
+        phases = c.get("/api/startup").json()["phases"]
+    for name in ("imports", "config_load", "ready", "first_client"):
+        assert name in phases
+    assert phases["imports"]["duration"] > 0
+
+
+def test_backend_import_defers_optional_heavy_modules():
+    code = "import sys, fighterdisplay.ui.backend.main; print(sorted({'numpy', 'mido', 'rtmidi'} & set(sys.modules)))"
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "[]"
@@ -0,0 +1,104 @@
+from fighterdisplay.core.subscriptions import Subscription
+from fighterdisplay.ui.backend.main import app, state
+from fastapi.testclient import TestClient
+
+
+def test_heartbeat_rate_follows_visibility_and_max_fps():
+    sub = Subscription()
+    assert sub.heartbeat_due(0.0, 10, 0.2)
+    assert not sub.heartbeat_due(0.05, 10, 0.2)
+    assert sub.heartbeat_due(0.1, 10, 0.2)
+    sub.update({"type": "subscribe", "visible": False})
+    assert sub.heartbeat_due(1.0, 10, 0.2)
+    assert not sub.heartbeat_due(3.0, 10, 0.2)  # hidden: ~every 5 s
+    assert sub.heartbeat_due(5.6, 10, 0.2)
+    sub.update({"visible": True, "max_fps": 2})
+    assert sub.heartbeat_due(5.7, 10, 0.2)  # becoming visible resets the wait
+    assert not sub.heartbeat_due(6.0, 10, 0.2)
+    assert sub.heartbeat_due(6.2, 10, 0.2)
+
+
+def test_banks_for_current_and_explicit_lists():
+    sub = Subscription()
+    assert sub.banks_for(3) is None
+    sub.update({"banks": "current"})
+    assert sub.banks_for(3) == frozenset({3})
+    sub.update({"banks": [1, "2"]})
+    assert sub.banks_for(3) == frozenset({1, 2})
+
+
+def test_ws_state_is_filtered_to_subscribed_banks():
+    state.update_encoder(1, 1, 11)
+    state.update_encoder(2, 1, 22)
+    c = TestClient(app)
+    with c.websocket_connect("/ws?banks=2") as ws:
+        init = ws.receive_json()
+        assert list(init["state"]["banks"]) == ["2"]
+        ws.send_text('{"type": "subscribe", "banks": "current"}')
+        assert ws.receive_json() == {"type": "subscribed", "banks": "current", "visible": True, "max_fps": None}
+        c.post("/api/bank", json={"bank": 1})
+        msg = ws.receive_json()
+        assert msg["type"] == "bank"
+        assert list(msg["state"]["banks"]) == ["1"]
+    with c.websocket_connect("/ws") as ws:
+        assert {"1", "2"} <= set(ws.receive_json()["state"]["banks"])
+
+
+def test_fan_out_keeps_clients_that_connect_mid_send():
+    import asyncio
+
+    from fighterdisplay.ui.backend import main
+
+    late = object()
+
+    class _Socket:
+        def __init__(self, fail=False):
+            self.fail = fail
+
+        async def send_text(self, text):
+            main.connections.add(late)  # another client registers during the await
+            await asyncio.sleep(0)
+            if self.fail:
+                raise RuntimeError("gone")
+
+    ok, broken = _Socket(), _Socket(fail=True)
+    saved = set(main.connections)
+    main.connections.clear()
+    main.connections.update({ok, broken})
+    try:
+        asyncio.run(main._fan_out(lambda ws: "{}"))
+        assert main.connections == {ok, late}
+    finally:
+        main.connections.clear()
+        main.connections.update(saved)
+
+
+def test_morph_deltas_skip_hidden_and_slow_clients():
+    import asyncio
+
+    from fighterdisplay.ui.backend import main
+
+    class _Socket:
+        def __init__(self):
+            self.sent = []
+
+        async def send_text(self, text):
+            self.sent.append(text)
+
+    visible, hidden, slow = _Socket(), _Socket(), _Socket()
+    subs = {visible: Subscription(), hidden: Subscription(), slow: Subscription()}
+    subs[hidden].update({"visible": False})
+    subs[slow].update({"max_fps": main.MORPH_HZ / 2})
+    saved = set(main.connections), dict(main.subscriptions)
+    main.connections.clear()
+    main.connections.update(subs)
+    main.subscriptions.update(subs)
+    try:
+        asyncio.run(main.broadcast_values([(1, 1, 64)], version=1))
+        assert len(visible.sent) == 1
+        assert hidden.sent == [] and slow.sent == []
+    finally:
+        main.connections.clear()
+        main.connections.update(saved[0])
+        main.subscriptions.clear()
+        main.subscriptions.update(saved[1])
@@ -0,0 +1,115 @@
+import base64
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from fighterdisplay.midi.device import open_input_raw, open_output_raw, send_sysex
+from fighterdisplay.midi.sysex import ACK, DUMP_DATA, LoopbackCodec, SysexError, SysexTransfer, pack7, unpack7
+from fighterdisplay.midi.virtual import TWISTER, VIRTUAL, SysexStandIn
+from fighterdisplay.ui.backend import main
+from fighterdisplay.ui.backend.main import app
+
+CONFIG = bytes(range(256)) * 16  # 4 KiB with every byte value
+
+
+def _connect(device, **options):
+    out = open_output_raw(TWISTER)
+    transfer = SysexTransfer(lambda frame: send_sysex(out, frame), LoopbackCodec(), **options)
+    inp = open_input_raw(TWISTER, lambda cc: None, sysex=transfer.feed)
+    return inp, transfer
+
+
+def test_framing_round_trips_and_rejects_corruption():
+    for data in (b"", b"\x00", bytes(range(256)), b"\xff" * 13):
+        assert unpack7(pack7(data)) == data
+        assert all(b < 0x80 for b in pack7(data))
+    codec = LoopbackCodec()
+    frame = codec.write_chunk(300, b"\x80abc")
+    assert codec.unframe(frame) == (codec.WRITE, 300, pack7(b"\x80abc"))
+    assert codec.parse(frame) is None  # host -> device, not a reply
+    assert codec.parse(codec.frame(DUMP_DATA, 2, pack7(b"\x80abc"))) == (DUMP_DATA, 2, b"\x80abc")
+    assert codec.parse(codec.frame(ACK, 9)) == (ACK, 9, b"")
+    corrupt = bytearray(frame)
+    corrupt[6] ^= 0x01
+    assert codec.unframe(bytes(corrupt)) is None
+    assert codec.parse(b"\xf0\x00\x20\x29\x01\x02\xf7") is None  # someone else's SysEx
+
+
+def test_restore_retries_lost_and_refused_chunks_then_dumps(monkeypatch):
+    monkeypatch.setenv("MIDI_BACKEND", "virtual")
+    device = VIRTUAL.reset()
+    stand_in = SysexStandIn(device, drop={3, 20}, nak={7}, ack_delay=0.001)
+    progress = []
+    inp, transfer = _connect(
+        device, rate=1e6, ack_timeout=0.1, progress=lambda done, total: progress.append((done, total))
+    )
+    started = time.monotonic()
+    transfer.restore(CONFIG)
+    assert time.monotonic() - started < 2.0
+    assert stand_in.memory == CONFIG
+    chunks = -(-len(CONFIG) // transfer.codec.chunk_size)
+    assert transfer.retransmits == 3 and stand_in.writes == chunks + 3
+    assert progress[0] == (0, chunks) and progress[-1] == (chunks, chunks)
+    assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+
+    stand_in.memory = CONFIG[::-1]
+    assert transfer.dump() == CONFIG[::-1]
+    inp.close()
+
+
+def test_restore_is_paced_and_gives_up_without_acks(monkeypatch):
+    monkeypatch.setenv("MIDI_BACKEND", "virtual")
+    device = VIRTUAL.reset()
+    SysexStandIn(device)
+    inp, transfer = _connect(device, rate=20000)
+    data = CONFIG[:1024]
+    started = time.monotonic()
+    transfer.restore(data)
+    # Frames never leave faster than the byte rate (the first one is free)
+    frames = [frame for _, frame in device.captured if frame[:1] == b"\xf0"]
+    assert time.monotonic() - started >= (sum(map(len, frames)) - len(frames[0])) / 20000 * 0.9
+    inp.close()
+
+    device.sysex_handler = None  # silent device
+    inp, transfer = _connect(device, rate=1e6, ack_timeout=0.02, retries=1)
+    with pytest.raises(SysexError):
+        transfer.restore(data)
+    with pytest.raises(SysexError):
+        transfer.dump()
+    inp.close()
+
+
+def test_server_stores_device_settings_in_preset_and_restores_them(tmp_path, monkeypatch, wait_for):
+    monkeypatch.setenv('CONFIG_PATH', str(tmp_path / 'config.json'))
+    monkeypatch.setenv("MIDI_BACKEND", "virtual")
+    device = VIRTUAL.reset()
+    stand_in = SysexStandIn(device, memory=CONFIG)
+    with TestClient(app) as c:
+        assert c.post('/api/device/restore', json={}).json()["ok"] is False
+        assert wait_for(lambda: main._midi_in is not None and main._midi_out is not None)
+        r = c.post('/api/device/dump').json()
+        assert r == {"ok": True, "bytes": len(CONFIG), "dirty": True}
+        status = c.get('/api/device/transfer').json()
+        assert status["state"] == "done" and status["done"] == status["total"] > 0
+        assert c.post('/api/presets/save', json={'name': 'with-device'}).json()["ok"]
+        saved = json.loads((tmp_path / 'with-device.json').read_text())
+        assert base64.b64decode(saved["device"]["sysex"]) == CONFIG
+
+        stand_in.memory = b""
+        assert c.post('/api/device/restore', json={}).json() == {"ok": True, "bytes": len(CONFIG)}
+        assert stand_in.memory == CONFIG
+        assert c.post('/api/device/restore', json={"data": "not base64!"}).json()["ok"] is False
+
+
+def test_server_refuses_transfers_to_devices_without_a_codec(monkeypatch):
+    # A mido port (or real hardware): no codec is known for its command set
+    monkeypatch.setattr(main, "_midi_out", object())
+    c = TestClient(app)
+    pending = main.midi_output.pending()
+    started = time.monotonic()
+    assert c.post('/api/device/dump').json() == {"ok": False, "error": "unsupported device"}
+    assert c.post('/api/device/restore', json={"data": "AAAA"}).json() == {"ok": False, "error": "unsupported device"}
+    assert time.monotonic() - started < 0.5
+    assert main.midi_output.pending() == pending  # nothing was queued for the device
@@ -0,0 +1,55 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from fighterdisplay.midi.device import list_input_ports, open_input_raw, open_output_raw, send_cc_batch
+from fighterdisplay.midi.virtual import DIN_BYTES_PER_SECOND, TWISTER, VIRTUAL
+from fighterdisplay.ui.backend import main
+from fighterdisplay.ui.backend.main import app
+
+
+def test_virtual_ports_capture_pace_and_unplug(monkeypatch):
+    monkeypatch.setenv("MIDI_BACKEND", "virtual")
+    ticks = iter([0.0, 0.0, 0.0, 10.0])
+    device = VIRTUAL.reset(bandwidth=DIN_BYTES_PER_SECOND, clock=lambda: next(ticks))
+    assert list_input_ports() == [TWISTER]
+    received = []
+    inp = open_input_raw(TWISTER, received.append)
+    out = open_output_raw(TWISTER)
+    assert device.play([(0, cc, 1) for cc in range(5)], rate=1000) == 5
+    assert received == [(0, cc, 1) for cc in range(5)]
+    # Three frames sent at t=0 queue up on the 3125 B/s link: ~0.96 ms apart
+    assert send_cc_batch(out, [(0, 1, 2), (0, 3, 4), (1, 5, 6)])
+    times = [t for t, _ in device.received()]
+    assert [round(t * 1e4) for t in times] == [10, 19, 29]
+    assert send_cc_batch(out, [(0, 7, 8)])  # idle link: delivered at send time + one frame
+    assert device.received()[-1] == (pytest.approx(10.00096), (0, 7, 8))
+    # Unplugged: ports vanish, old handles are dead even after replugging
+    device.disconnect()
+    assert list_input_ports() == [] and not device.inject((0, 1, 1))
+    device.reconnect()
+    assert not send_cc_batch(out, [(0, 1, 1)])
+    assert device.inject((0, 9, 9)) and received[-1] == (0, 4, 1)
+    inp.close()
+
+
+def test_server_echoes_paces_and_survives_hotplug(tmp_path, monkeypatch, wait_for):
+    monkeypatch.setenv('CONFIG_PATH', str(tmp_path / 'config.json'))
+    monkeypatch.setenv("MIDI_BACKEND", "virtual")
+    monkeypatch.setattr(main, "MIDI_RESCAN", 0.05)
+    device = VIRTUAL.reset()
+    with TestClient(app) as c:
+        assert c.get('/api/ports').json() == {"inputs": [TWISTER], "outputs": [TWISTER]}
+        c.post('/api/mapping/temp', json={'bank': 1, 'encoder': 2, 'cc': 33})
+        assert wait_for(lambda: main._midi_in is not None)
+        device.inject((0, 33, 90))
+        assert main.state.snapshot().banks[1].encoders[2].value == 90
+        # LED echo goes back out through the paced output
+        assert wait_for(lambda: (0, 33, 90) in [cc for _, cc in device.received()])
+
+        device.disconnect()
+        assert wait_for(lambda: main._midi_out is None)
+        c.post('/api/midi', json={'control': 33, 'value': 15, 'channel': 0})
+        device.clear()
+        device.reconnect()
+        # Replugged: reopened and the LED rings are resynced to the server's values
+        assert wait_for(lambda: (0, 33, 15) in [cc for _, cc in device.received()])